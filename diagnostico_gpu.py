@@ -2,15 +2,26 @@
 """
 Script de diagnóstico para verificar configuração da GPU/CUDA.
 """
+import argparse
+import functools
+import shlex
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 
+@functools.lru_cache(maxsize=None)
 def run_command(command, description=""):
-    """Executa comando e retorna resultado."""
+    """
+    Executa comando e retorna resultado (memoizado por comando).
+    
+    O comando (string ou tupla de argumentos) é executado diretamente, sem
+    passar por um shell intermediário.
+    """
+    args = shlex.split(command) if isinstance(command, str) else list(command)
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(args, shell=False, capture_output=True, text=True)
         return result.returncode == 0, result.stdout.strip(), result.stderr.strip()
     except Exception as e:
         return False, "", str(e)
@@ -63,7 +74,11 @@ def check_pytorch_cuda():
     print("\n🔍 Verificando PyTorch CUDA...")
     
     try:
-        import torch
+        torch = _get_torch()
+        if torch is None:
+            print("❌ PyTorch não instalado!")
+            return False
+        
         print(f"✅ PyTorch {torch.__version__} instalado!")
         
         cuda_available = torch.cuda.is_available()
@@ -81,9 +96,6 @@ def check_pytorch_cuda():
             
         return cuda_available
         
-    except ImportError:
-        print("❌ PyTorch não instalado!")
-        return False
     except Exception as e:
         print(f"❌ Erro ao verificar PyTorch: {e}")
         return False
@@ -94,7 +106,11 @@ def check_pytorch_installation():
     print("\n🔍 Verificando instalação do PyTorch...")
     
     try:
-        import torch
+        torch = _get_torch()
+        if torch is None:
+            print("   PyTorch não instalado!")
+            return False
+        
         print(f"   Versão: {torch.__version__}")
         print(f"   Compilado com CUDA: {torch.version.cuda}")
         print(f"   Compilado com cuDNN: {torch.backends.cudnn.version()}")
@@ -112,6 +128,31 @@ def check_pytorch_installation():
         return False
 
 
+@functools.lru_cache(maxsize=None)
+def _get_torch():
+    """Importa o PyTorch uma única vez; retorna None se não estiver instalado."""
+    try:
+        import torch
+        return torch
+    except ImportError:
+        return None
+
+
+def prefetch_probes(include_torch=True):
+    """
+    Dispara em paralelo as sondagens lentas (nvidia-smi, nvcc e import do torch).
+    
+    As verificações continuam imprimindo em ordem; elas apenas reaproveitam
+    os resultados já obtidos (run_command e _get_torch são memoizados).
+    """
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        executor.submit(run_command, "nvidia-smi")
+        executor.submit(run_command, "nvcc --version")
+        if include_torch:
+            # Exceções aqui são reportadas depois pelas verificações do PyTorch
+            executor.submit(_get_torch)
+
+
 def suggest_fixes(has_nvidia, has_cuda, has_pytorch_cuda):
     """Sugere correções baseadas nos problemas encontrados."""
     print("\n" + "="*50)
@@ -134,7 +175,7 @@ def suggest_fixes(has_nvidia, has_cuda, has_pytorch_cuda):
         print("   2. Instale seguindo as instruções do site")
         print("   3. Adicione ao PATH se necessário")
     
-    if has_nvidia and has_cuda and not has_pytorch_cuda:
+    if has_nvidia and has_cuda and has_pytorch_cuda is False:
         print("\n❌ PROBLEMA: PyTorch sem suporte CUDA")
         print("🔧 SOLUÇÃO - Reinstalar PyTorch com CUDA:")
         print("   1. Desinstale PyTorch atual:")
@@ -164,13 +205,21 @@ def suggest_fixes(has_nvidia, has_cuda, has_pytorch_cuda):
 
 def main():
     """Função principal do diagnóstico."""
+    parser = argparse.ArgumentParser(description='Diagnóstico GPU/CUDA do PDF Digest')
+    parser.add_argument('--skip-torch', action='store_true',
+                        help='Pula as verificações do PyTorch (evita o import do torch)')
+    args = parser.parse_args()
+    
     print("🔧 DIAGNÓSTICO GPU/CUDA - PDF Digest")
     print("="*50)
     
-    # Executa verificações
+    # Executa as sondagens lentas em paralelo antes das verificações
+    prefetch_probes(include_torch=not args.skip_torch)
+    
+    # Executa verificações (None indica verificação do PyTorch não executada)
     has_nvidia = check_nvidia_driver()
     has_cuda = check_cuda_toolkit()
-    has_pytorch_cuda = check_pytorch_cuda()
+    has_pytorch_cuda = None if args.skip_torch else check_pytorch_cuda()
     
     # Informações do sistema
     print(f"\n💻 SISTEMA:")
@@ -178,7 +227,8 @@ def main():
     print(f"   OS: {os.name}")
     
     # Verifica instalação PyTorch
-    check_pytorch_installation()
+    if not args.skip_torch:
+        check_pytorch_installation()
     
     # Sugere correções
     suggest_fixes(has_nvidia, has_cuda, has_pytorch_cuda)
@@ -10,10 +10,20 @@ Este script demonstra:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+import hashlib
 import json
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson é opcional; cai para o decoder da stdlib
+    _json_loads = json.loads
 
 
 class PDFTableExtractionDemo:
@@ -25,10 +35,31 @@ class PDFTableExtractionDemo:
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         
+        # Sessão única: reaproveita conexões (keep-alive) entre todas as chamadas
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Cache com escopo de uma execução do demo: (hash, endpoint, params) -> resposta
+        self._pdf_hashes: Dict[str, str] = {}
+        self._result_cache: Dict[Tuple[str, str, Tuple], requests.Response] = {}
+    
+    def close(self):
+        """Fecha a sessão HTTP e descarta o cache de resultados."""
+        self.session.close()
+        self._result_cache.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
     def health_check(self) -> bool:
         """Verifica se o serviço está ativo."""
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=5)
+            response = self.session.get(f"{self.api_url}/health", timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -44,36 +75,72 @@ class PDFTableExtractionDemo:
         print(f"\n🔍 Extraindo tabelas em formato {format.upper()}...")
         
         try:
-            with open(pdf_path, 'rb') as f:
-                files = {'file': f}
-                params = {'format': format}
-                
-                response = requests.post(
-                    f"{self.api_url}/extract-tables",
-                    files=files,
-                    params=params,
-                    timeout=30
-                )
-            
-            if response.status_code == 200:
-                result = response.json()
-                tables_count = len(result['data']['tables'])
-                print(f"✅ Sucesso! {tables_count} tabelas extraídas")
-                
-                # Mostra informações das tabelas
-                for table in result['data']['tables']:
-                    print(f"   📊 Tabela {table['id']}: {table['metadata']['rows']}x{table['metadata']['cols']} (página {table['page']})")
-                
-                return result
-            else:
-                print(f"❌ Erro: {response.status_code}")
-                print(response.text)
-                return {}
+            response = self._post_pdf("extract-tables", pdf_path, {'format': format})
+            return self._report_tables(response)
                 
         except Exception as e:
             print(f"❌ Erro na extração: {e}")
             return {}
     
+    def _post_pdf(self, endpoint: str, pdf_path: str, params: Dict[str, str]) -> requests.Response:
+        """
+        Envia o PDF para um endpoint da API em streaming.
+        
+        O corpo multipart é gerado em blocos a partir do disco, sem carregar
+        o arquivo inteiro em memória antes do envio. Respostas bem-sucedidas
+        são reaproveitadas quando o mesmo PDF é enviado novamente ao mesmo
+        endpoint com os mesmos parâmetros.
+        """
+        cache_key = (self.pdf_hash(pdf_path), endpoint, tuple(sorted(params.items())))
+        cached_response = self._result_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
+        
+        with open(pdf_path, 'rb') as f:
+            encoder = MultipartEncoder(
+                fields={'file': (Path(pdf_path).name, f, 'application/pdf')}
+            )
+            
+            response = self.session.post(
+                f"{self.api_url}/{endpoint}",
+                data=encoder,
+                headers={'Content-Type': encoder.content_type},
+                params=params,
+                timeout=30
+            )
+        
+        if response.status_code == 200:
+            self._result_cache[cache_key] = response
+        return response
+    
+    def pdf_hash(self, pdf_path: str) -> str:
+        """Calcula (uma única vez por caminho) o SHA-256 do PDF."""
+        pdf_hash = self._pdf_hashes.get(pdf_path)
+        if pdf_hash is None:
+            hash_sha256 = hashlib.sha256()
+            with open(pdf_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    hash_sha256.update(chunk)
+            pdf_hash = self._pdf_hashes[pdf_path] = hash_sha256.hexdigest()
+        return pdf_hash
+    
+    def _report_tables(self, response: requests.Response) -> Dict[str, Any]:
+        """Mostra o resumo das tabelas retornadas pelo endpoint."""
+        if response.status_code == 200:
+            result = _json_loads(response.content)
+            tables_count = len(result['data']['tables'])
+            print(f"✅ Sucesso! {tables_count} tabelas extraídas")
+            
+            # Mostra informações das tabelas
+            for table in result['data']['tables']:
+                print(f"   📊 Tabela {table['id']}: {table['metadata']['rows']}x{table['metadata']['cols']} (página {table['page']})")
+            
+            return result
+        else:
+            print(f"❌ Erro: {response.status_code}")
+            print(response.text)
+            return {}
+    
     def extract_tables_with_files(self, pdf_path: str, format: str = "json") -> Dict[str, Any]:
         """
         Demonstra extração com salvamento automático de arquivos.
@@ -81,29 +148,26 @@ class PDFTableExtractionDemo:
         print(f"\n💾 Extraindo tabelas com salvamento automático...")
         
         try:
-            with open(pdf_path, 'rb') as f:
-                files = {'file': f}
-                params = {'format': format, 'save_files': 'true'}
-                
-                response = requests.post(
-                    f"{self.api_url}/extract-tables",
-                    files=files,
-                    params=params,
-                    timeout=30
-                )
+            params = {'format': format, 'save_files': 'true'}
+            response = self._post_pdf("extract-tables", pdf_path, params)
             
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 export_info = result['data']['export_info']
                 
-                if export_info['files_saved']:
-                    saved_files = export_info['saved_files']
-                    print(f"✅ Arquivos salvos:")
-                    for file_type, file_list in saved_files.items():
-                        if file_list:
-                            print(f"   📁 {file_type.upper()}: {len(file_list)} arquivos")
-                            for file_path in file_list:
-                                print(f"      └── {file_path}")
+                # A gravação roda em segundo plano: saved_files descreve o job
+                saved_files = export_info['saved_files']
+                if export_info['files_saved'] and saved_files:
+                    print(f"⏳ Gravação enfileirada: job {saved_files['job_id']}")
+                    print(f"   🔗 Status: {self.base_url}{saved_files['status_url']}")
+                    
+                    job = self._wait_for_job(saved_files['status_url'])
+                    if job.get('status') == 'finished':
+                        self._report_saved_files(job['result'])
+                    elif job.get('status') == 'failed':
+                        print(f"❌ Falha ao salvar arquivos: {job['error']['message']}")
+                    else:
+                        print(f"⚠️  Job ainda em andamento ({job.get('status', 'desconhecido')})")
                 
                 return result
             else:
@@ -114,6 +178,37 @@ class PDFTableExtractionDemo:
             print(f"❌ Erro na extração: {e}")
             return {}
     
+    def _wait_for_job(self, status_url: str, timeout: float = 60.0,
+                      interval: float = 0.5) -> Dict[str, Any]:
+        """Consulta o job em status_url até concluir (finished/failed) ou esgotar o timeout."""
+        deadline = time.monotonic() + timeout
+        job: Dict[str, Any] = {}
+        while time.monotonic() < deadline:
+            response = self.session.get(f"{self.base_url}{status_url}")
+            if response.status_code != 200:
+                print(f"❌ Erro ao consultar job: {response.status_code}")
+                return {}
+            
+            job = _json_loads(response.content)['data']
+            if job['status'] in ('finished', 'failed'):
+                break
+            time.sleep(interval)
+        return job
+    
+    def _report_saved_files(self, saved_files: Dict[str, Any]):
+        """Lista os arquivos gravados por formato e as URLs de download."""
+        download_urls = saved_files.get('download_urls', {})
+        print(f"✅ Arquivos salvos:")
+        for file_type, file_list in saved_files.items():
+            if file_type == 'download_urls' or not file_list:
+                continue
+            print(f"   📁 {file_type.upper()}: {len(file_list)} arquivos")
+            urls = download_urls.get(file_type, [])
+            for i, file_path in enumerate(file_list):
+                print(f"      └── {file_path}")
+                if i < len(urls):
+                    print(f"          ⬇️  {self.base_url}{urls[i]}")
+    
     def convert_enhanced(self, pdf_path: str, table_format: str = "json") -> Dict[str, Any]:
         """
         Demonstra conversão combinada (Markdown + Tabelas).
@@ -121,22 +216,14 @@ class PDFTableExtractionDemo:
         print(f"\n🔄 Conversão avançada (Markdown + Tabelas)...")
         
         try:
-            with open(pdf_path, 'rb') as f:
-                files = {'file': f}
-                params = {
-                    'include_tables': 'true',
-                    'table_format': table_format
-                }
-                
-                response = requests.post(
-                    f"{self.api_url}/convert-enhanced",
-                    files=files,
-                    params=params,
-                    timeout=30
-                )
+            params = {
+                'include_tables': 'true',
+                'table_format': table_format
+            }
+            response = self._post_pdf("convert-enhanced", pdf_path, params)
             
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 data = result['data']
                 
                 markdown_pages = len(data['markdown']['pages'])
@@ -158,16 +245,32 @@ class PDFTableExtractionDemo:
     def demonstrate_all_formats(self, pdf_path: str):
         """
         Demonstra extração em todos os formatos disponíveis.
+        
+        As requisições são independentes e limitadas por I/O, então são
+        disparadas em paralelo (cada uma lê o PDF em streaming); o relatório
+        é impresso na ordem dos formatos.
         """
         print("\n🎯 Demonstrando todos os formatos disponíveis:")
         
         formats = ['json', 'csv', 'excel', 'html']
         results = {}
         
-        for fmt in formats:
-            result = self.extract_tables_basic(pdf_path, fmt)
-            if result:
-                results[fmt] = result
+        with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+            futures = {
+                fmt: executor.submit(self._post_pdf, "extract-tables", pdf_path, {'format': fmt})
+                for fmt in formats
+            }
+            
+            for fmt in formats:
+                print(f"\n🔍 Extraindo tabelas em formato {fmt.upper()}...")
+                try:
+                    result = self._report_tables(futures[fmt].result())
+                except Exception as e:
+                    print(f"❌ Erro na extração: {e}")
+                    result = {}
+                
+                if result:
+                    results[fmt] = result
         
         return results
     
@@ -208,8 +311,14 @@ def main():
     print("=" * 60)
     
     # Inicializa o demonstrador
-    demo = PDFTableExtractionDemo()
-    
+    with PDFTableExtractionDemo() as demo:
+        run_demo(demo)
+
+
+def run_demo(demo: PDFTableExtractionDemo):
+    """
+    Executa a demonstração usando uma sessão já aberta.
+    """
     # Verifica se o serviço está ativo
     if not demo.health_check():
         print("❌ Serviço PDF Digest não está disponível!")
@@ -221,7 +330,10 @@ def main():
     # Solicita arquivo PDF para teste
     pdf_path = input("\n📄 Digite o caminho para um arquivo PDF: ").strip()
     
-    if not os.path.exists(pdf_path):
+    try:
+        # Abrir o arquivo para o hash já confirma que ele existe (sem stat extra)
+        demo.pdf_hash(pdf_path)
+    except FileNotFoundError:
         print(f"❌ Arquivo não encontrado: {pdf_path}")
         return
     
@@ -6,10 +6,52 @@ Este script demonstra como fazer requisições para converter PDFs em Markdown
 usando diferentes métodos (upload e arquivo existente).
 """
 
-import requests
+import argparse
+import ijson
 import json
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 import os
+import sys
+import time
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson é opcional; cai para a stdlib
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+logger = logging.getLogger("pdf_digest_client")
+
+# Tamanho do buffer de leitura do PDF durante o upload
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Tamanho do buffer de escrita dos arquivos markdown gerados
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Tamanho máximo do corpo de cada lote (a API aceita até 16MB por requisição)
+BATCH_MAX_BYTES = 15 * 1024 * 1024
+
+# Respostas menores que isso são lidas de uma vez; maiores são processadas em streaming
+STREAM_THRESHOLD_BYTES = 256 * 1024
+
+# Tempo (segundos) em que respostas de health/info ficam em cache no cliente
+PROBE_CACHE_TTL = 5.0
+
+# Arquivo de exemplo usado pelo comando "demo" (baseado nos logs)
+DEMO_DIR = "C:/Users/jotae/OneDrive/Dev/IA Dev/Investdash/data/665f1f62633e1b04b75feec7"
+DEMO_FILENAME = "XPINC_NOTA_NEGOCIACAO_B3_5_2014.pdf"
 
 
 class PDFDigestClient:
@@ -18,74 +60,205 @@ class PDFDigestClient:
     def __init__(self, base_url: str = "http://localhost:5000"):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
+        
+        # Sessão única com keep-alive; headers padrão definidos uma só vez.
+        # ACCEPT_ENCODING inclui "br" quando o pacote brotli está instalado.
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            # Retentativas no pool de conexões com backoff exponencial. Retentativas
+            # por status/leitura valem só para métodos idempotentes (GET/HEAD...):
+            # o corpo multipart em streaming não pode ser reenviado.
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Cache curto de sondagens: chave -> (instante monotônico, valor)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+    
+    def close(self):
+        """Fecha a sessão HTTP e libera as conexões do pool."""
+        self.session.close()
+        self._cache.clear()
+    
+    def _cached(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache para a chave ou o obtém via fetch (TTL de PROBE_CACHE_TTL)."""
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < PROBE_CACHE_TTL:
+            return entry[1]
+        
+        value = fetch()
+        self._cache[key] = (now, value)
+        return value
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def health_check(self) -> bool:
-        """Verifica se a API está funcionando."""
+        """Verifica se a API está funcionando (resultado reaproveitado por alguns segundos)."""
+        return self._cached('health', self._fetch_health)
+    
+    def _fetch_health(self) -> bool:
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=5)
+            response = self.session.get(f"{self.api_url}/health", timeout=5)
             return response.status_code == 200
         except:
             return False
     
-    def convert_pdf_upload(self, file_path: str) -> dict:
+    def get_info(self) -> dict:
+        """Obtém as informações da API (/api/info), com o mesmo cache curto do health check."""
+        return self._cached('info', self._fetch_info)
+    
+    def _fetch_info(self) -> dict:
+        try:
+            response = self.session.get(f"{self.api_url}/info", timeout=5)
+            if response.status_code == 200:
+                return _json_loads(response.content)['data']
+        except Exception as e:
+            logger.error("❌ Erro ao obter informações da API: %s", e)
+        return {}
+    
+    def convert_pdf_upload(self, file_path: str, output_dir: Optional[str] = None) -> dict:
         """
         Converte PDF fazendo upload do arquivo.
         
         Args:
             file_path: Caminho para o arquivo PDF local
+            output_dir: Se informado, respostas grandes têm as páginas gravadas
+                direto em disco à medida que chegam
             
         Returns:
             Dicionário com o resultado da conversão
         """
-        print(f"📤 Fazendo upload e conversão de: {file_path}")
+        logger.info("📤 Fazendo upload e conversão de: %s", file_path)
         
-        if not os.path.exists(file_path):
-            print(f"❌ Arquivo não encontrado: {file_path}")
+        # EAFP: a própria abertura confirma a existência (sem stat extra)
+        try:
+            f = open(file_path, 'rb', buffering=UPLOAD_BUFFER_SIZE)
+        except FileNotFoundError:
+            logger.error("❌ Arquivo não encontrado: %s", file_path)
             return {}
         
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
+            # Corpo multipart gerado em streaming a partir do disco, em blocos de 1 MiB
+            with f:
+                encoder = MultipartEncoder(
+                    fields={'file': (Path(file_path).name, f, 'application/pdf')}
+                )
+                response = self.session.post(
                     f"{self.api_url}/convert",
-                    files=files,
-                    timeout=60  # 60 segundos de timeout
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type},
+                    timeout=60,  # 60 segundos de timeout
+                    stream=True
                 )
             
-            if response.status_code == 200:
-                result = response.json()
-                pages_count = len(result['data']['pages'])
-                file_size = result['data']['file_info']['size_formatted']
+            with response:
+                return self._handle_convert_response(response, Path(file_path).stem, output_dir)
                 
-                print(f"✅ Conversão concluída!")
-                print(f"   📄 Páginas: {pages_count}")
-                print(f"   📏 Tamanho: {file_size}")
-                print(f"   🖥️ Device: {result['data']['processing_info']['device']}")
-                
-                return result['data']
-            else:
-                print(f"❌ Erro HTTP {response.status_code}")
+        except Exception as e:
+            logger.error("❌ Erro na requisição: %s", e)
+            return {}
+    
+    def convert_pdfs_batch(self, paths: List[str]) -> List[dict]:
+        """
+        Converte vários PDFs enviando-os juntos em requisições multipart.
+        
+        Os arquivos são agrupados em lotes de até BATCH_MAX_BYTES, de modo
+        que cada lote respeita o limite de tamanho da API.
+        
+        Args:
+            paths: Caminhos dos arquivos PDF locais
+            
+        Returns:
+            Lista com o resultado de cada arquivo, na ordem de entrada
+        """
+        results: List[Optional[dict]] = [None] * len(paths)
+        batch, batch_size = [], 0
+        handles = ExitStack()
+        
+        try:
+            for index, path in enumerate(paths):
+                # EAFP: abrir já confirma a existência; o tamanho vem do próprio handle
                 try:
-                    error_detail = response.json()
-                    print(f"   Detalhes: {error_detail.get('error', 'Erro desconhecido')}")
-                except:
-                    print(f"   Resposta: {response.text}")
-                return {}
+                    fh = open(path, 'rb', buffering=UPLOAD_BUFFER_SIZE)
+                except FileNotFoundError:
+                    logger.error("❌ Arquivo não encontrado: %s", path)
+                    results[index] = {'success': False, 'filename': Path(path).name,
+                                      'error': 'Arquivo não encontrado'}
+                    continue
                 
-        except requests.exceptions.Timeout:
-            print("❌ Timeout na requisição (arquivo muito grande?)")
-            return {}
+                file_size = os.fstat(fh.fileno()).st_size
+                if batch and batch_size + file_size > BATCH_MAX_BYTES:
+                    self._send_batch(batch, results)
+                    handles.close()
+                    batch, batch_size = [], 0
+                
+                handles.enter_context(fh)
+                batch.append((index, path, fh))
+                batch_size += file_size
+            
+            if batch:
+                self._send_batch(batch, results)
+        finally:
+            handles.close()
+        
+        return results
+    
+    def _send_batch(self, batch: List[Tuple[int, str, Any]], results: List[Optional[dict]]):
+        """Envia um lote de arquivos já abertos e grava cada resultado na sua posição."""
+        logger.info("📤 Enviando lote com %s arquivo(s)...", len(batch))
+        
+        try:
+            encoder = MultipartEncoder(fields={
+                f"file{i}": (Path(path).name, fh, 'application/pdf')
+                for i, (_, path, fh) in enumerate(batch)
+            })
+            response = self.session.post(
+                f"{self.api_url}/convert-batch",
+                data=encoder,
+                headers={'Content-Type': encoder.content_type},
+                timeout=60 * len(batch)
+            )
+            
+            if response.status_code == 200:
+                batch_results = _json_loads(response.content)['data']['results']
+                succeeded = sum(1 for item in batch_results if item['success'])
+                logger.info("✅ Lote concluído: %s/%s arquivos convertidos", succeeded, len(batch_results))
+                for (index, _, _), item in zip(batch, batch_results):
+                    results[index] = item
+                return
+            
+            logger.error("❌ Erro HTTP %s no lote", response.status_code)
+            error = f"HTTP {response.status_code}"
+            
         except Exception as e:
-            print(f"❌ Erro na requisição: {e}")
-            return {}
+            logger.error("❌ Erro na requisição do lote: %s", e)
+            error = str(e)
+        
+        for index, path, _ in batch:
+            results[index] = {'success': False, 'filename': Path(path).name, 'error': error}
     
-    def convert_pdf_existing(self, file_path: str, filename: str = None) -> dict:
+    def convert_pdf_existing(self, file_path: str, filename: str = None,
+                             output_dir: Optional[str] = None) -> dict:
         """
         Converte PDF que já existe no servidor.
         
         Args:
             file_path: Caminho do diretório no servidor
             filename: Nome do arquivo (opcional, se não informado será extraído do path)
+            output_dir: Se informado, respostas grandes têm as páginas gravadas
+                direto em disco à medida que chegam
             
         Returns:
             Dicionário com o resultado da conversão
@@ -96,8 +269,8 @@ class PDFDigestClient:
             file_path = str(Path(file_path).parent)
             filename = Path(full_path).name
         
-        print(f"📁 Convertendo arquivo existente: {filename}")
-        print(f"   📂 Diretório: {file_path}")
+        logger.info("📁 Convertendo arquivo existente: %s", filename)
+        logger.info("   📂 Diretório: %s", file_path)
         
         try:
             data = {
@@ -105,108 +278,217 @@ class PDFDigestClient:
                 "filename": filename
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/convert",
-                json=data,
+                data=_json_dumps(data),
                 headers={'Content-Type': 'application/json'},
-                timeout=60
+                timeout=60,
+                stream=True
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                pages_count = len(result['data']['pages'])
-                file_size = result['data']['file_info']['size_formatted']
-                
-                print(f"✅ Conversão concluída!")
-                print(f"   📄 Páginas: {pages_count}")
-                print(f"   📏 Tamanho: {file_size}")
-                print(f"   🖥️ Device: {result['data']['processing_info']['device']}")
-                
-                return result['data']
-            else:
-                print(f"❌ Erro HTTP {response.status_code}")
-                try:
-                    error_detail = response.json()
-                    print(f"   Detalhes: {error_detail.get('error', 'Erro desconhecido')}")
-                except:
-                    print(f"   Resposta: {response.text}")
-                return {}
+            with response:
+                return self._handle_convert_response(response, Path(filename).stem, output_dir)
                 
-        except requests.exceptions.Timeout:
-            print("❌ Timeout na requisição")
-            return {}
         except Exception as e:
-            print(f"❌ Erro na requisição: {e}")
+            logger.error("❌ Erro na requisição: %s", e)
+            return {}
+    
+    def _handle_convert_response(self, response: requests.Response, filename_base: str,
+                                 output_dir: Optional[str]) -> dict:
+        """
+        Interpreta a resposta da conversão.
+        
+        Respostas pequenas (ou sem output_dir) são lidas de uma vez. Respostas
+        grandes são percorridas com ijson: cada página é gravada em disco assim
+        que é lida, sem materializar o JSON inteiro em memória.
+        """
+        if response.status_code != 200:
+            logger.error("❌ Erro HTTP %s", response.status_code)
+            try:
+                error_detail = _json_loads(response.content)
+                logger.error("   Detalhes: %s", error_detail.get('error', 'Erro desconhecido'))
+            except:
+                logger.error("   Resposta: %s", response.text)
             return {}
+        
+        content_length = int(response.headers.get('Content-Length', 0)) or None
+        if output_dir is None or (content_length is not None and content_length < STREAM_THRESHOLD_BYTES):
+            result = _json_loads(response.content)
+            pages_count = len(result['data']['pages'])
+            file_size = result['data']['file_info']['size_formatted']
+            
+            logger.info("✅ Conversão concluída!")
+            logger.info("   📄 Páginas: %s", pages_count)
+            logger.info("   📏 Tamanho: %s", file_size)
+            logger.info("   🖥️ Device: %s", result['data']['processing_info']['device'])
+            
+            return result['data']
+        
+        # Descomprime (gzip/br) o corpo bruto antes de entregá-lo ao parser
+        response.raw.decode_content = True
+        pages = ijson.kvitems(response.raw, 'data.pages')
+        saved_files = self._write_pages(pages, output_dir, filename_base)
+        
+        logger.info("✅ Conversão concluída (streaming)!")
+        logger.info("   📄 Páginas: %s", len(saved_files) - 1)
+        logger.info("\n💾 Arquivos salvos em: %s", output_dir)
+        
+        return {'streamed': True, 'saved_files': saved_files}
+    
+    def _write_pages(self, pages: Iterable[Tuple[str, str]], output_dir: str,
+                     filename_base: str) -> List[str]:
+        """
+        Grava as páginas em uma única passada: arquivo combinado + um arquivo por página.
+        
+        Aceita qualquer iterável de (número da página, conteúdo), inclusive
+        um gerador que é consumido uma única vez.
+        """
+        Path(output_dir).mkdir(exist_ok=True)
+        
+        combined_file = f"{output_dir}/{filename_base}_completo.md"
+        saved_files = [combined_file]
+        
+        with open(combined_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as combined:
+            combined.write(f"# {filename_base}\n\n")
+            for page_num, content in pages:
+                combined.write(f"## Página {page_num}\n\n{content}\n\n---\n\n")
+                
+                page_file = f"{output_dir}/{filename_base}_pagina_{page_num}.md"
+                with open(page_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                    f.write(content)
+                saved_files.append(page_file)
+        
+        return saved_files
     
     def show_pages_preview(self, result: dict, max_chars: int = 200):
         """Mostra preview das páginas convertidas."""
         if not result or 'pages' not in result:
             return
         
-        print(f"\n📖 Preview das páginas convertidas:")
-        print("=" * 50)
-        
-        for page_num, content in result['pages'].items():
-            print(f"\n📄 Página {page_num}:")
-            print("-" * 30)
-            preview = content[:max_chars]
-            if len(content) > max_chars:
-                preview += "..."
-            print(preview)
+        # Monta todo o preview e escreve de uma vez (uma escrita em vez de uma por linha)
+        separator = "-" * 30
+        buf = [f"\n📖 Preview das páginas convertidas:\n{'=' * 50}"]
+        buf.extend(
+            f"\n📄 Página {page_num}:\n{separator}\n"
+            f"{content[:max_chars]}{'...' if len(content) > max_chars else ''}"
+            for page_num, content in result['pages'].items()
+        )
+        buf.append("")
+        sys.stdout.write("\n".join(buf))
+        sys.stdout.flush()
     
     def save_to_files(self, result: dict, output_dir: str = "output"):
         """Salva as páginas convertidas em arquivos markdown."""
         if not result or 'pages' not in result:
             return
         
-        # Cria diretório de saída
-        Path(output_dir).mkdir(exist_ok=True)
-        
         filename_base = result.get('file_info', {}).get('filename', 'documento')
         filename_base = Path(filename_base).stem  # Remove extensão
         
-        saved_files = []
+        # Uma única passada pelas páginas grava o arquivo combinado e os individuais
+        saved_files = self._write_pages(result['pages'].items(), output_dir, filename_base)
         
-        # Salva arquivo combinado
-        combined_file = f"{output_dir}/{filename_base}_completo.md"
-        with open(combined_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {filename_base}\n\n")
-            for page_num, content in result['pages'].items():
-                f.write(f"## Página {page_num}\n\n")
-                f.write(content)
-                f.write("\n\n---\n\n")
-        saved_files.append(combined_file)
-        
-        # Salva páginas individuais
-        for page_num, content in result['pages'].items():
-            page_file = f"{output_dir}/{filename_base}_pagina_{page_num}.md"
-            with open(page_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            saved_files.append(page_file)
-        
-        print(f"\n💾 Arquivos salvos em: {output_dir}")
+        logger.info("\n💾 Arquivos salvos em: %s", output_dir)
         for file_path in saved_files:
-            print(f"   📝 {file_path}")
+            logger.info("   📝 %s", file_path)
         
         return saved_files
 
 
+def build_parser() -> argparse.ArgumentParser:
+    """Monta o parser de linha de comando do cliente."""
+    parser = argparse.ArgumentParser(description='Cliente da API /api/convert do PDF Digest')
+    parser.add_argument('--base-url', default='http://localhost:5000',
+                        help='URL base da API (padrão: http://localhost:5000)')
+    parser.add_argument('--save', action='store_true',
+                        help='Salva as páginas convertidas em arquivos markdown')
+    parser.add_argument('--output-dir', default='output',
+                        help='Diretório de saída usado com --save (padrão: output)')
+    parser.add_argument('--interactive', action='store_true',
+                        help='Usa o menu interativo (padrão quando nenhum comando é informado)')
+    
+    sub = parser.add_subparsers(dest='cmd')
+    
+    upload = sub.add_parser('upload', help='Upload de arquivo(s) local(is)')
+    upload.add_argument('--file', nargs='+', required=True,
+                        help='Um ou mais PDFs; vários arquivos são enviados em lote')
+    
+    existing = sub.add_parser('existing', help='Arquivo existente no servidor')
+    existing.add_argument('--dir', required=True, help='Diretório do arquivo no servidor')
+    existing.add_argument('--filename', required=True, help='Nome do arquivo')
+    
+    sub.add_parser('demo', help='Exemplo com arquivo de teste dos logs')
+    
+    return parser
+
+
 def main():
     """Função principal de demonstração."""
-    print("🚀 PDF Digest - Cliente da API /api/convert")
-    print("=" * 50)
+    args = build_parser().parse_args()
     
-    # Inicializa cliente
-    client = PDFDigestClient()
+    # Saída do cliente via logging (formatação lazy, uma escrita por linha)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     
+    logger.info("🚀 PDF Digest - Cliente da API /api/convert")
+    logger.info("=" * 50)
+    
+    # Inicializa cliente (a sessão HTTP é fechada ao final)
+    with PDFDigestClient(args.base_url) as client:
+        if args.interactive or args.cmd is None:
+            run_client(client)
+        else:
+            run_cli(client, args)
+
+
+def run_cli(client: PDFDigestClient, args: argparse.Namespace):
+    """Executa um comando da linha de comando, sem interação com o usuário."""
+    if not client.health_check():
+        logger.error("❌ API PDF Digest não está disponível!")
+        logger.error("   Certifique-se de que está rodando em %s", client.base_url)
+        sys.exit(1)
+    
+    output_dir = args.output_dir if args.save else None
+    
+    if args.cmd == 'upload' and len(args.file) > 1:
+        results = client.convert_pdfs_batch(args.file)
+        for result in results:
+            if result['success'] and args.save:
+                client.save_to_files(result, args.output_dir)
+        
+        if not all(result['success'] for result in results):
+            logger.error("\n❌ Falha na conversão de um ou mais arquivos!")
+            sys.exit(1)
+        logger.info("\n🎉 Conversão concluída com sucesso!")
+        return
+    
+    if args.cmd == 'upload':
+        result = client.convert_pdf_upload(args.file[0], output_dir)
+    elif args.cmd == 'existing':
+        result = client.convert_pdf_existing(args.dir, args.filename, output_dir)
+    else:
+        logger.info("📋 Usando exemplo dos logs...")
+        result = client.convert_pdf_existing(DEMO_DIR, DEMO_FILENAME, output_dir)
+    
+    if not result:
+        logger.error("\n❌ Falha na conversão!")
+        sys.exit(1)
+    
+    client.show_pages_preview(result)
+    if args.save:
+        client.save_to_files(result, args.output_dir)
+    
+    logger.info("\n🎉 Conversão concluída com sucesso!")
+
+
+def run_client(client: PDFDigestClient):
+    """Executa o menu interativo usando um cliente já inicializado."""
     # Verifica se API está ativa
     if not client.health_check():
-        print("❌ API PDF Digest não está disponível!")
-        print("   Certifique-se de que está rodando em http://localhost:5000")
+        logger.error("❌ API PDF Digest não está disponível!")
+        logger.error("   Certifique-se de que está rodando em http://localhost:5000")
         return
     
-    print("✅ API PDF Digest está ativa!")
+    logger.info("✅ API PDF Digest está ativa!")
     
     # Menu de opções
     print("\nEscolha uma opção:")
@@ -229,13 +511,10 @@ def main():
         
     elif choice == "3":
         # Exemplo baseado nos logs
-        print("📋 Usando exemplo dos logs...")
-        result = client.convert_pdf_existing(
-            "C:/Users/jotae/OneDrive/Dev/IA Dev/Investdash/data/665f1f62633e1b04b75feec7",
-            "XPINC_NOTA_NEGOCIACAO_B3_5_2014.pdf"
-        )
+        logger.info("📋 Usando exemplo dos logs...")
+        result = client.convert_pdf_existing(DEMO_DIR, DEMO_FILENAME)
     else:
-        print("❌ Opção inválida!")
+        logger.error("❌ Opção inválida!")
         return
     
     # Mostra resultados
@@ -247,9 +526,9 @@ def main():
         if save in ['s', 'sim', 'y', 'yes']:
             client.save_to_files(result)
         
-        print("\n🎉 Conversão concluída com sucesso!")
+        logger.info("\n🎉 Conversão concluída com sucesso!")
     else:
-        print("\n❌ Falha na conversão!")
+        logger.error("\n❌ Falha na conversão!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,17 @@
+"""
+Hooks do gunicorn para o PDF Digest (carregado automaticamente do diretório de trabalho).
+
+As opções de execução continuam na linha de comando (ver src/wsgi.py).
+"""
+
+
+def post_fork(server, worker):
+    """
+    Inicia a limpeza periódica no worker.
+
+    Todos os workers iniciam a thread, mas só o que obtém o lock do
+    CleanupService limpa; o master não executa código da aplicação.
+    """
+    from src.services.cleanup_service import cleanup_service
+    
+    cleanup_service.start()
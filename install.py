@@ -3,23 +3,37 @@
 Script de instalação automatizada para o PDF Digest.
 Este script resolve automaticamente os problemas de dependências.
 """
+import shlex
+import shutil
 import subprocess
 import sys
 import os
+from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 
 
 def run_command(command, description):
-    """Executa um comando e trata erros."""
+    """
+    Executa um comando e trata erros.
+    
+    O comando (lista de argumentos) roda sem shell intermediário e a saída vai direto ao terminal,
+    mostrando o progresso do pip em vez de acumulá-lo em memória.
+    """
     print(f"🔧 {description}...")
+    args = list(command)
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        subprocess.run(args, shell=False, check=True)
         print(f"✅ {description} concluído com sucesso!")
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Erro em {description}:")
-        print(f"   Comando: {command}")
-        print(f"   Erro: {e.stderr}")
+        print(f"   Comando: {shlex.join(args)}")
+        print(f"   Código de saída: {e.returncode} (detalhes na saída acima)")
+        return False
+    except OSError as e:
+        print(f"❌ Erro em {description}:")
+        print(f"   Comando: {shlex.join(args)}")
+        print(f"   Erro: {e}")
         return False
 
 
@@ -49,12 +63,13 @@ def install_dependencies():
         "pydantic-settings>=2.0.0"
     ]
     
-    for dep in critical_deps:
-        if not run_command(f"pip install '{dep}'", f"Instalando {dep}"):
-            return False
+    # Uma única chamada ao pip: o resolvedor e o índice são consultados uma vez só
+    pip = [sys.executable, '-m', 'pip', 'install', '--disable-pip-version-check', '--no-input']
+    if not run_command([*pip, *critical_deps], "Instalando dependências críticas"):
+        return False
     
     # Instala dependências mínimas
-    if not run_command("pip install -r requirements-minimal.txt", "Instalando dependências mínimas"):
+    if not run_command([*pip, '-r', 'requirements-minimal.txt'], "Instalando dependências mínimas"):
         return False
     
     return True
@@ -77,8 +92,8 @@ def create_env_file():
     if not os.path.exists('.env'):
         print("⚙️ Criando arquivo de configuração .env...")
         try:
-            with open('env.example', 'r') as src, open('.env', 'w') as dst:
-                dst.write(src.read())
+            # Cópia feita pelo kernel quando disponível (sendfile)
+            shutil.copyfile('env.example', '.env')
             print("✅ Arquivo .env criado com configurações padrão!")
         except FileNotFoundError:
             print("⚠️ Arquivo env.example não encontrado, criando .env básico...")
@@ -101,14 +116,17 @@ def test_installation():
     print("🧪 Testando a instalação...")
     
     try:
-        # Testa imports críticos
-        import pydantic
-        import pydantic_settings
-        import flask
-        print(f"✅ Pydantic {pydantic.VERSION} instalado!")
-        print(f"✅ Flask {flask.__version__} instalado!")
+        # Verifica pacotes críticos pelos metadados (sem importá-los)
+        for package, label in (("pydantic", "Pydantic"),
+                               ("pydantic-settings", "Pydantic Settings"),
+                               ("flask", "Flask")):
+            try:
+                print(f"✅ {label} {version(package)} instalado!")
+            except PackageNotFoundError:
+                print(f"❌ {label} não encontrado!")
+                return False
         
-        # Testa configurações
+        # Testa configurações (único import real: exercita o carregamento da config)
         from src.config.settings import settings
         print(f"✅ Configurações carregadas! Upload folder: {settings.upload_folder}")
         
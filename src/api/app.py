@@ -2,15 +2,62 @@
 Aplicação Flask principal do PDF Digest.
 """
 import logging
-from flask import Flask
+
+import orjson
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
 
 from src.config.settings import settings
 from src.api.routes import api_bp
 from src.api.middlewares import setup_all_middlewares
 
+try:
+    from flask_compress import Compress
+except ImportError:  # Compressão é opcional (não está nas dependências mínimas)
+    Compress = None
+
 logger = logging.getLogger(__name__)
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask baseado em orjson.
+    
+    jsonify e request.get_json passam a usar o encoder/decoder em C; tipos
+    que o orjson não conhece (Decimal, objetos com __html__) caem no
+    default do Flask. A saída é sempre compacta e sem ordenação de chaves.
+    """
+    
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.OPTIONS),
+            mimetype=self.mimetype
+        )
+
+
+# Payload estático da rota raiz, serializado uma única vez
+ROOT_PAYLOAD = orjson.dumps({
+    'name': 'PDF Digest API',
+    'version': '1.0.0',
+    'status': 'running',
+    'endpoints': {
+        'health': '/api/health',
+        'convert': '/api/convert',
+        'stats': '/api/stats',
+        'info': '/api/info'
+    }
+})
+
+
 def create_app() -> Flask:
     """
     Factory function para criar e configurar a aplicação Flask.
@@ -27,11 +74,26 @@ def create_app() -> Flask:
         'MAX_CONTENT_LENGTH': settings.max_content_length,
         'UPLOAD_FOLDER': settings.upload_folder,
         'DEBUG': settings.debug,
-        'TESTING': False,
-        'JSON_SORT_KEYS': False,
-        'JSONIFY_PRETTYPRINT_REGULAR': True
+        'TESTING': False
     })
     
+    # JSON via orjson: compacto e sem ordenação de chaves (Flask 2.3 ignora
+    # JSON_SORT_KEYS e JSONIFY_PRETTYPRINT_REGULAR; o comportamento fica no provider)
+    app.json = OrjsonProvider(app)
+    
+    # Compressão das respostas (markdown comprime 5-10x), respeitando Accept-Encoding
+    if Compress is not None:
+        app.config.update({
+            'COMPRESS_ALGORITHM': ['zstd', 'br', 'gzip'],
+            'COMPRESS_MIN_SIZE': 1024,
+            'COMPRESS_LEVEL': 3,
+            'COMPRESS_BR_LEVEL': 3,
+            'COMPRESS_ZSTD_LEVEL': 3
+        })
+        Compress(app)
+    else:
+        logger.info("flask-compress não instalado; respostas serão enviadas sem compressão")
+    
     # Configura todos os middlewares
     setup_all_middlewares(app)
     
@@ -41,17 +103,7 @@ def create_app() -> Flask:
     # Rota raiz básica
     @app.route('/')
     def root():
-        return {
-            'name': 'PDF Digest API',
-            'version': '1.0.0',
-            'status': 'running',
-            'endpoints': {
-                'health': '/api/health',
-                'convert': '/api/convert',
-                'stats': '/api/stats',
-                'info': '/api/info'
-            }
-        }
+        return Response(ROOT_PAYLOAD, mimetype='application/json')
     
     logger.info("Aplicação Flask configurada com sucesso")
     return app 
\ No newline at end of file
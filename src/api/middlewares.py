@@ -1,17 +1,22 @@
 """
 Middlewares para a API do PDF Digest.
 """
+import math
 import time
+import uuid
 import logging
+import threading
+from bisect import bisect_left
 from functools import wraps
 from typing import Dict, Any
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
 
-from flask import Flask, request, jsonify, g
+import orjson
+from flask import Flask, Response, request, jsonify, g
 from werkzeug.exceptions import TooManyRequests
 
 from src.config.settings import settings
+from src.services.cache_service import cache_service
 from src.utils.exceptions import RateLimitExceeded
 from src.utils.helpers import sanitize_log_data
 
@@ -19,14 +24,21 @@ logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
-    """Rate limiter simples em memória."""
+    """
+    Rate limiter simples em memória.
     
-    def __init__(self):
-        self.requests = defaultdict(lambda: {
-            'minute': deque(),
-            'hour': deque(), 
-            'day': deque()
-        })
+    Mantém uma única fila de timestamps monotônicos por identificador; a
+    contagem de cada janela (minuto/hora/dia) é obtida por busca binária.
+    Os identificadores ficam em um LRU limitado a max_clients entradas, de
+    modo que a memória não cresce com a quantidade de IPs distintos.
+    """
+    
+    WINDOWS = (60, 3600, 86400)
+    
+    def __init__(self, max_clients: int = None):
+        self.max_clients = max_clients or settings.rate_limit_max_clients
+        self.requests: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
     
     def is_allowed(self, identifier: str) -> bool:
         """
@@ -38,117 +50,252 @@ class RateLimiter:
         Returns:
             True se permitido, False caso contrário
         """
-        now = datetime.now()
-        user_requests = self.requests[identifier]
-        
-        # Limpa requisições antigas
-        self._cleanup_old_requests(user_requests, now)
-        
-        # Verifica limites
-        limits = [
-            (user_requests['minute'], settings.rate_limit_per_minute, 60),
-            (user_requests['hour'], settings.rate_limit_per_hour, 3600),
-            (user_requests['day'], settings.rate_limit_per_day, 86400)
-        ]
+        return self.acquire(identifier) == 0
+    
+    def acquire(self, identifier: str) -> int:
+        """
+        Registra a requisição se estiver dentro dos limites.
         
-        for request_queue, limit, window in limits:
-            if len(request_queue) >= limit:
-                return False
+        Args:
+            identifier: Identificador único (IP, user_id, etc.)
+            
+        Returns:
+            0 se permitida; caso contrário, segundos até haver vaga na janela estourada
+        """
+        limits = (
+            settings.rate_limit_per_minute,
+            settings.rate_limit_per_hour,
+            settings.rate_limit_per_day
+        )
         
-        # Registra a requisição atual
-        timestamp = now.timestamp()
-        user_requests['minute'].append(timestamp)
-        user_requests['hour'].append(timestamp)
-        user_requests['day'].append(timestamp)
+        with self._lock:
+            now = time.monotonic()
+            timestamps = self.requests.get(identifier)
+            if timestamps is None:
+                timestamps = self.requests[identifier] = deque()
+                # Descarta o identificador usado há mais tempo
+                if len(self.requests) > self.max_clients:
+                    self.requests.popitem(last=False)
+            else:
+                self.requests.move_to_end(identifier)
+            
+            # Descarta apenas o que já saiu da maior janela (dia)
+            cutoff = now - self.WINDOWS[-1]
+            while timestamps and timestamps[0] < cutoff:
+                timestamps.popleft()
+            
+            # Verifica limites: requisições dentro de cada janela
+            for window, limit in zip(self.WINDOWS, limits):
+                start = bisect_left(timestamps, now - window)
+                count = len(timestamps) - start
+                if count >= limit:
+                    # Vaga surge quando sair da janela a requisição que excede o limite
+                    oldest = timestamps[start + count - limit] if limit > 0 else now
+                    return max(1, math.ceil(oldest + window - now))
+            
+            # Registra a requisição atual
+            timestamps.append(now)
+            return 0
+
+
+class RedisRateLimiter:
+    """
+    Rate limiter de janela deslizante compartilhado via Redis.
+    
+    Cada identificador tem um sorted set (ratelimit:{id}) com os instantes
+    das requisições aceitas, então o limite vale para todos os workers e
+    sobrevive a reinícios. Um script Lua descarta o que saiu da maior
+    janela, conta cada janela (minuto/hora/dia) e registra a requisição
+    atomicamente, em uma única ida ao Redis. Se o Redis estiver
+    indisponível, usa o limiter em memória.
+    """
+    
+    # ARGV: agora, membro, depois pares (janela, limite) em ordem crescente de janela.
+    # Só registra se nenhuma janela estourou (requisição negada não conta).
+    # Retorna 0 se permitida ou os segundos até surgir vaga na janela estourada
+    LUA_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local longest = tonumber(ARGV[#ARGV - 1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - longest)
+    for i = 3, #ARGV, 2 do
+        local window = tonumber(ARGV[i])
+        local limit = tonumber(ARGV[i + 1])
+        local count = redis.call('ZCOUNT', KEYS[1], now - window, '+inf')
+        if count >= limit then
+            local retry = window
+            if limit > 0 then
+                local oldest = redis.call('ZRANGEBYSCORE', KEYS[1], now - window, '+inf',
+                                          'WITHSCORES', 'LIMIT', count - limit, 1)
+                retry = tonumber(oldest[2]) + window - now
+            end
+            return math.max(1, math.ceil(retry))
+        end
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[2])
+    redis.call('EXPIRE', KEYS[1], longest)
+    return 0
+    """
+    
+    def __init__(self, fallback: RateLimiter):
+        self.fallback = fallback
+        self._script = None
+    
+    def _get_script(self):
+        """Registra o script Lua no cliente Redis na primeira utilização (EVALSHA)."""
+        if self._script is None:
+            self._script = cache_service.client.register_script(self.LUA_SCRIPT)
+        return self._script
+    
+    def is_allowed(self, identifier: str) -> bool:
+        """
+        Verifica se a requisição está dentro dos limites.
         
-        return True
+        Args:
+            identifier: Identificador único (IP, user_id, etc.)
+            
+        Returns:
+            True se permitido, False caso contrário
+        """
+        return self.acquire(identifier) == 0
     
-    def _cleanup_old_requests(self, user_requests: Dict, now: datetime):
-        """Remove requisições antigas das filas."""
-        windows = {
-            'minute': 60,
-            'hour': 3600,
-            'day': 86400
-        }
+    def acquire(self, identifier: str) -> int:
+        """
+        Registra a requisição se estiver dentro dos limites.
         
-        for period, window_seconds in windows.items():
-            cutoff = now.timestamp() - window_seconds
-            queue = user_requests[period]
+        Args:
+            identifier: Identificador único (IP, user_id, etc.)
             
-            while queue and queue[0] < cutoff:
-                queue.popleft()
+        Returns:
+            0 se permitida; caso contrário, segundos até haver vaga na janela estourada
+        """
+        if not cache_service.enabled or not cache_service.client:
+            return self.fallback.acquire(identifier)
+        
+        limits = (
+            settings.rate_limit_per_minute,
+            settings.rate_limit_per_hour,
+            settings.rate_limit_per_day
+        )
+        
+        # Relógio de parede, comum a todos os workers; o membro só precisa ser único
+        now = time.time()
+        args = [now, uuid.uuid4().hex]
+        for window, limit in zip(RateLimiter.WINDOWS, limits):
+            args.extend((window, limit))
+        
+        try:
+            return int(self._get_script()(keys=[f"ratelimit:{identifier}"], args=args))
+        except Exception as e:
+            logger.warning("Rate limit via Redis indisponível, usando memória: %s", e)
+            return self.fallback.acquire(identifier)
 
 
 # Instância global do rate limiter
-rate_limiter = RateLimiter()
+rate_limiter = RedisRateLimiter(RateLimiter())
 
+# Identificadores isentos de rate limiting (consulta O(1), sem acesso ao Redis)
+RATE_LIMIT_ALLOWLIST = frozenset(settings.rate_limit_allowlist)
 
-def setup_security_headers(app: Flask):
-    """Configura headers de segurança."""
-    
-    @app.after_request
-    def set_security_headers(response):
-        # Headers de segurança
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY'
-        response.headers['X-XSS-Protection'] = '1; mode=block'
-        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        
-        # HTTPS enforcement (apenas em produção)
-        if not settings.debug:
-            response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-        
-        # Content Security Policy básico
-        response.headers['Content-Security-Policy'] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data:; "
-            "connect-src 'self'"
-        )
-        
-        return response
 
+# Valores de headers usados em todas as respostas
+_CSP = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline'; "
+    "style-src 'self' 'unsafe-inline'; "
+    "img-src 'self' data:; "
+    "connect-src 'self'"
+)
+_HSTS = 'max-age=31536000; includeSubDomains'
+_CORS_ORIGIN = '*'
+_CORS_HEADERS = 'Content-Type,Authorization'
+_CORS_METHODS = 'GET,PUT,POST,DELETE,OPTIONS'
 
-def setup_cors(app: Flask):
-    """Configura CORS."""
-    
-    @app.after_request
-    def after_request(response):
-        # CORS headers básicos
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-        return response
+# Headers fixos de todas as respostas (segurança + CORS), montados uma vez no import
+STATIC_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Content-Security-Policy': _CSP,
+    'Access-Control-Allow-Origin': _CORS_ORIGIN,
+    'Access-Control-Allow-Headers': _CORS_HEADERS,
+    'Access-Control-Allow-Methods': _CORS_METHODS
+}
+
+
+# Content-Types aceitos nos endpoints que recebem arquivos
+_ACCEPTED_CONTENT_TYPES = (
+    'multipart/form-data',
+    'application/pdf',
+    'application/octet-stream',
+    'application/json'
+)
+
+
+# Endpoints (nome completo, com o blueprint) que recebem o PDF
+_UPLOAD_ENDPOINTS = frozenset((
+    'api.convert_pdf',
+    'api.convert_pdf_batch',
+    'api.extract_tables',
+    'api.convert_pdf_enhanced'
+))
+
+
+def _validate_content_type():
+    """Valida Content-Type para endpoints que esperam arquivos."""
+    if request.endpoint in _UPLOAD_ENDPOINTS and request.method == 'POST':
+        content_type = request.content_type
+        
+        # Permite multipart/form-data e PDF no corpo (upload de arquivo) e application/json
+        if content_type and not content_type.startswith(_ACCEPTED_CONTENT_TYPES):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'message': 'Content-Type não suportado',
+                    'code': 'UNSUPPORTED_CONTENT_TYPE',
+                    'details': {
+                        'received': content_type,
+                        'expected': list(_ACCEPTED_CONTENT_TYPES)
+                    }
+                }
+            }), 400
     
-    @app.route('/options', methods=['OPTIONS'])
-    def handle_options():
-        return jsonify({'status': 'ok'}), 200
+    return None
 
 
-def setup_logging_middleware(app: Flask):
-    """Configura middleware de logging."""
+def setup_request_hooks(app: Flask):
+    """
+    Configura os hooks por requisição: um único before_request (logging e
+    validação de Content-Type) e um único after_request (headers e logging).
+    """
+    response_headers = dict(STATIC_HEADERS)
+    
+    # HTTPS enforcement (apenas em produção)
+    if not settings.debug:
+        response_headers['Strict-Transport-Security'] = _HSTS
     
     @app.before_request
-    def log_request_info():
+    def before_request():
         g.start_time = time.time()
         
-        # Log da requisição (com dados sanitizados)
-        request_data = {
-            'method': request.method,
-            'path': request.path,
-            'remote_addr': request.remote_addr,
-            'user_agent': request.headers.get('User-Agent', ''),
-            'content_length': request.content_length
-        }
+        # Log da requisição (com dados sanitizados), só montado se INFO estiver ativo
+        if logger.isEnabledFor(logging.INFO):
+            request_data = {
+                'method': request.method,
+                'path': request.path,
+                'remote_addr': request.remote_addr,
+                'user_agent': request.headers.get('User-Agent', ''),
+                'content_length': request.content_length
+            }
+            
+            # Sanitiza dados sensíveis
+            logger.info("Requisição recebida: %s", sanitize_log_data(request_data))
         
-        # Sanitiza dados sensíveis
-        sanitized_data = sanitize_log_data(request_data)
-        logger.info(f"Requisição recebida: {sanitized_data}")
+        return _validate_content_type()
     
     @app.after_request
-    def log_response_info(response):
-        if hasattr(g, 'start_time'):
+    def after_request(response):
+        if hasattr(g, 'start_time') and logger.isEnabledFor(logging.INFO):
             duration = time.time() - g.start_time
             
             response_data = {
@@ -157,9 +304,15 @@ def setup_logging_middleware(app: Flask):
                 'duration_ms': round(duration * 1000, 2)
             }
             
-            logger.info(f"Resposta enviada: {response_data}")
+            logger.info("Resposta enviada: %s", response_data)
         
+        # Headers de segurança e CORS em uma única atualização
+        response.headers.update(response_headers)
         return response
+    
+    @app.route('/options', methods=['OPTIONS'])
+    def handle_options():
+        return jsonify({'status': 'ok'}), 200
 
 
 def rate_limit_middleware():
@@ -171,8 +324,12 @@ def rate_limit_middleware():
             # Usa IP como identificador (em produção seria mais sofisticado)
             identifier = request.remote_addr or 'unknown'
             
-            if not rate_limiter.is_allowed(identifier):
-                logger.warning(f"Rate limit excedido para {identifier}")
+            if identifier in RATE_LIMIT_ALLOWLIST:
+                return f(*args, **kwargs)
+            
+            retry_after = rate_limiter.acquire(identifier)
+            if retry_after:
+                logger.warning("Rate limit excedido para %s", identifier)
                 raise RateLimitExceeded(
                     "Muitas requisições. Tente novamente mais tarde.",
                     code="RATE_LIMIT_EXCEEDED",
@@ -181,7 +338,8 @@ def rate_limit_middleware():
                             'per_minute': settings.rate_limit_per_minute,
                             'per_hour': settings.rate_limit_per_hour,
                             'per_day': settings.rate_limit_per_day
-                        }
+                        },
+                        'retry_after': retry_after
                     }
                 )
             
@@ -192,96 +350,67 @@ def rate_limit_middleware():
     return decorator
 
 
+def _json_response(body: Any, status: int) -> Response:
+    """Serializa a resposta com orjson (mais rápido que o encoder da stdlib); aceita bytes prontos."""
+    if not isinstance(body, bytes):
+        body = orjson.dumps(body)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _static_error(message: str, code: str, details: Dict[str, Any] = None) -> bytes:
+    """Serializa no carregamento do módulo um corpo de erro que não muda entre requisições."""
+    error = {'message': message, 'code': code}
+    if details is not None:
+        error['details'] = details
+    return orjson.dumps({'success': False, 'error': error})
+
+
+# Corpos dos handlers de erro sem partes variáveis
+_FILE_TOO_LARGE_BODY = _static_error(
+    'Arquivo muito grande', 'FILE_TOO_LARGE',
+    {'max_size_mb': settings.max_content_length / (1024 * 1024)}
+)
+_NOT_FOUND_BODY = _static_error('Endpoint não encontrado', 'NOT_FOUND')
+_METHOD_NOT_ALLOWED_BODY = _static_error('Método não permitido', 'METHOD_NOT_ALLOWED')
+_INTERNAL_ERROR_BODY = _static_error('Erro interno do servidor', 'INTERNAL_ERROR')
+
+
 def setup_error_handlers(app: Flask):
     """Configura handlers de erro."""
     
     @app.errorhandler(RateLimitExceeded)
     def handle_rate_limit_exceeded(error):
-        return jsonify({
+        response = _json_response({
             'success': False,
             'error': {
                 'message': error.message,
                 'code': error.code,
                 'details': error.details
             }
-        }), 429
+        }, 429)
+        if 'retry_after' in error.details:
+            response.headers['Retry-After'] = str(error.details['retry_after'])
+        return response
     
     @app.errorhandler(413)
     def handle_file_too_large(error):
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Arquivo muito grande',
-                'code': 'FILE_TOO_LARGE',
-                'details': {
-                    'max_size_mb': settings.max_content_length / (1024 * 1024)
-                }
-            }
-        }), 413
+        return _json_response(_FILE_TOO_LARGE_BODY, 413)
     
     @app.errorhandler(404)
     def handle_not_found(error):
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Endpoint não encontrado',
-                'code': 'NOT_FOUND'
-            }
-        }), 404
+        return _json_response(_NOT_FOUND_BODY, 404)
     
     @app.errorhandler(405)
     def handle_method_not_allowed(error):
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Método não permitido',
-                'code': 'METHOD_NOT_ALLOWED'
-            }
-        }), 405
+        return _json_response(_METHOD_NOT_ALLOWED_BODY, 405)
     
     @app.errorhandler(500)
     def handle_internal_error(error):
-        logger.error(f"Erro interno do servidor: {error}")
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Erro interno do servidor',
-                'code': 'INTERNAL_ERROR'
-            }
-        }), 500
-
-
-def setup_request_validation(app: Flask):
-    """Configura validação de requisições."""
-    
-    @app.before_request
-    def validate_content_type():
-        # Valida Content-Type para endpoints que esperam arquivos
-        if request.endpoint in ['convert_pdf'] and request.method == 'POST':
-            content_type = request.content_type
-            
-            # Permite multipart/form-data (upload de arquivo) e application/json
-            if content_type and not (
-                content_type.startswith('multipart/form-data') or
-                content_type.startswith('application/json')
-            ):
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'message': 'Content-Type não suportado',
-                        'code': 'UNSUPPORTED_CONTENT_TYPE',
-                        'details': {
-                            'received': content_type,
-                            'expected': ['multipart/form-data', 'application/json']
-                        }
-                    }
-                }), 400
+        logger.error("Erro interno do servidor: %s", error)
+        return _json_response(_INTERNAL_ERROR_BODY, 500)
 
 
 def setup_all_middlewares(app: Flask):
     """Configura todos os middlewares."""
-    setup_security_headers(app)
-    setup_cors(app)
-    setup_logging_middleware(app)
-    setup_error_handlers(app)
-    setup_request_validation(app) 
\ No newline at end of file
+    setup_request_hooks(app)
+    setup_error_handlers(app)
\ No newline at end of file
@@ -2,26 +2,577 @@
 Rotas da API do PDF Digest.
 """
 import os
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote
 
-from flask import Blueprint, request, jsonify
+import orjson
+from flask import Blueprint, Response, request, send_from_directory
 
 from src.config.settings import settings
 from src.services.pdf_service import pdf_service
 from src.services.file_service import file_service
 from src.services.cache_service import cache_service
+from src.services.job_service import job_service
 from src.api.middlewares import rate_limit_middleware
 from src.utils.exceptions import PDFDigestException, ValidationError, SecurityError, ConversionError
-from src.utils.helpers import create_response, get_disk_usage, get_memory_usage
+from src.utils.helpers import create_response, get_disk_usage, get_memory_usage, json_response, utcnow_iso
 
 logger = logging.getLogger(__name__)
 
 # Blueprint para as rotas da API
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Códigos de erro reportados por arquivo na conversão em lote
+BATCH_ERROR_CODES = {
+    ValidationError: 'VALIDATION_ERROR',
+    SecurityError: 'SECURITY_ERROR',
+    ConversionError: 'CONVERSION_ERROR'
+}
+
+# Tamanho máximo de upload em MB, reportado por /health, /stats e /info
+MAX_FILE_SIZE_MB = settings.max_content_length / (1024 * 1024)
+
+# Limite de max_age_hours aceito por /cleanup (um ano)
+MAX_CLEANUP_AGE_HOURS = 24 * 365
+
+# Campos fixos de system_info no /health (definidos pelas configurações)
+HEALTH_STATIC_INFO = {
+    'upload_folder': settings.upload_folder,
+    'max_file_size_mb': MAX_FILE_SIZE_MB
+}
+
+# Tempo (segundos) em que a sondagem do Redis no /health fica em cache
+CACHE_PROBE_TTL = 2.0
+
+# Cache das sondagens: chave -> (instante monotônico, valor)
+_probe_cache: Dict[str, Tuple[float, Any]] = {}
+
+
+def _cached_probe(key: str, fetch: Callable[[], Any], ttl: float) -> Any:
+    """Retorna o valor em cache para a sondagem ou o obtém via fetch, com TTL em segundos."""
+    entry = _probe_cache.get(key)
+    now = time.monotonic()
+    if entry is not None and now - entry[0] < ttl:
+        return entry[1]
+    
+    value = fetch()
+    _probe_cache[key] = (now, value)
+    return value
+
+
+# Threads para executar em paralelo as sondagens independentes do /stats
+_probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='probe')
+
+
+def _gather_probes(probes: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Executa as sondagens em paralelo e retorna os resultados pela mesma chave."""
+    futures = {key: _probe_executor.submit(fetch) for key, fetch in probes.items()}
+    return {key: future.result() for key, future in futures.items()}
+
+
+# Content-Types aceitos para o PDF enviado diretamente no corpo da requisição
+RAW_UPLOAD_MIMETYPES = ('application/pdf', 'application/octet-stream')
+
+# Diretório (relativo ao diretório de trabalho) das tabelas salvas com save_files=true
+TABLES_OUTPUT_DIR = settings.tables_output_folder
+
+# Respostas em streaming: uma linha JSON por página (/convert) ou tabela (/extract-tables)
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Formatos de export de tabelas (a tupla preserva a ordem das mensagens de erro)
+TABLE_FORMATS = ('json', 'csv', 'excel', 'html')
+VALID_TABLE_FORMATS = frozenset(TABLE_FORMATS)
+TABLE_FORMATS_LABEL = ', '.join(TABLE_FORMATS)
+
+
+@dataclass(frozen=True, slots=True)
+class TableArgs:
+    """Parâmetros de extração de tabelas lidos da query string."""
+    format: str
+    save_files: bool
+    include_tables: bool
+
+
+def _parse_table_args(format_param: str = 'format') -> TableArgs:
+    """Lê de uma vez os parâmetros de tabela da query string da requisição."""
+    args = request.args
+    return TableArgs(
+        format=args.get(format_param, 'json').lower(),
+        save_files=args.get('save_files', 'false').lower() == 'true',
+        include_tables=args.get('include_tables', 'true').lower() == 'true'
+    )
+
+
+def _should_stream_upload() -> bool:
+    """
+    Indica se o upload multipart deve ser lido direto do request.stream.
+    
+    Corpos a partir de settings.stream_upload_min_size (ou sem
+    Content-Length) não passam pelo parser multipart do Werkzeug; uploads
+    pequenos continuam usando request.files.
+    """
+    return (
+        file_service.streaming_enabled
+        and request.mimetype == 'multipart/form-data'
+        and (request.content_length is None
+             or request.content_length >= settings.stream_upload_min_size)
+    )
+
+
+def _wants_async() -> bool:
+    """
+    Indica se a requisição deve ser processada em segundo plano.
+    
+    ?async=true|false decide explicitamente; ?wait=true força o modo
+    síncrono; sem nenhum dos dois vale settings.job_async_default.
+    """
+    requested = request.args.get('async')
+    if requested is not None:
+        return requested.lower() == 'true'
+    if request.args.get('wait', 'false').lower() == 'true':
+        return False
+    return settings.job_async_default
+
+
+def _wants_ndjson() -> bool:
+    """Indica se o cliente pediu a resposta em streaming NDJSON (?stream=true ou Accept)."""
+    return (request.args.get('stream', 'false').lower() == 'true'
+            or request.accept_mimetypes.best == NDJSON_MIMETYPE)
+
+
+def _enqueue_job(job: Callable[..., Dict[str, Any]], *args,
+                 cleanup_path: Optional[str] = None):
+    """Enfileira o job de conversão e responde 202 com a URL de acompanhamento."""
+    job_id = job_service.submit(job, *args, cleanup_path=cleanup_path)
+    logger.info("Conversão enfileirada: job %s", job_id)
+    return json_response(create_response(True, {
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"{api_bp.url_prefix}/jobs/{job_id}"
+    }), 202)
+
+
+def _prebuilt_error(error: str, code: str, details: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Serializa uma única vez a parte fixa de uma resposta de erro.
+    
+    Retorna o JSON de create_response a partir do campo após o timestamp,
+    que é o único valor que muda entre requisições (ver _prebuilt_response).
+    """
+    body = orjson.dumps({'error': {'message': error, 'code': code, 'details': details or {}}})
+    return b',' + body[1:]
+
+
+def _prebuilt_data(data: Any) -> bytes:
+    """Serializa uma única vez os dados de uma resposta de sucesso fixa (ver _prebuilt_error)."""
+    body = orjson.dumps({'data': data})
+    return b',' + body[1:]
+
+
+def _prebuilt_response(prebuilt: bytes, status: int, success: bool = False) -> Response:
+    """Monta a resposta pré-serializada com o timestamp atual."""
+    body = b'{"success":%s,"timestamp":%d%s' % (
+        b'true' if success else b'false', int(time.time()), prebuilt
+    )
+    return Response(body, status=status, mimetype='application/json')
+
+
+# Erros sem partes variáveis, serializados no carregamento do módulo
+_NO_FILE_ERROR = _prebuilt_error(
+    "Nenhum arquivo fornecido", "NO_FILE_PROVIDED",
+    {'instructions': 'Envie um arquivo PDF no campo "file" ou forneça "path" no JSON'}
+)
+_NO_BATCH_FILES_ERROR = _prebuilt_error(
+    "Nenhum arquivo fornecido", "NO_FILE_PROVIDED",
+    {'instructions': 'Envie um ou mais arquivos PDF em campos multipart (ex.: "file0", "file1")'}
+)
+_JOB_NOT_FOUND_ERROR = _prebuilt_error("Job não encontrado ou expirado", "JOB_NOT_FOUND")
+_INVALID_MAX_AGE_ERROR = _prebuilt_error(
+    f"max_age_hours deve ser um número entre 0 e {MAX_CLEANUP_AGE_HOURS}", "INVALID_PARAMETER"
+)
+
+
+def _resolve_input(context: str = '', in_memory: bool = False
+                   ) -> Tuple[Optional[Dict[str, Any]], Optional[str], bool]:
+    """
+    Identifica e valida o PDF da requisição, qualquer que seja a forma de envio.
+    
+    Args:
+        context: Sufixo das mensagens de log (ex.: " para extração de tabelas")
+        in_memory: Se uploads multipart pequenos devem ser lidos em memória
+        
+    Returns:
+        Tupla (file_info, file_path, is_upload); file_info é None quando
+        nenhum arquivo foi fornecido e file_path é None para uploads em memória
+    """
+    if request.mimetype in RAW_UPLOAD_MIMETYPES:
+        # Opção 0: PDF no corpo da requisição, sem multipart
+        logger.info("Processando PDF enviado no corpo da requisição%s", context)
+        file_info = file_service.save_raw_upload(
+            request.stream, request.args.get('filename'), request.content_type
+        )
+        return file_info, file_info['file_path'], True
+    
+    if _should_stream_upload():
+        # Opção 1a: Upload grande, gravado em disco à medida que chega
+        logger.info("Processando upload de arquivo em streaming%s", context)
+        file_info = file_service.save_streamed_upload(request.stream, request.content_type)
+        return file_info, file_info['file_path'], True
+    
+    if 'file' in request.files:
+        # Opção 1b: Upload de arquivo
+        logger.info("Processando upload de arquivo%s", context)
+        if in_memory:
+            # Lido em memória: o PDF não passa por um arquivo temporário
+            return file_service.read_uploaded_file(request.files['file']), None, False
+        file_info = file_service.save_uploaded_file(request.files['file'])
+        return file_info, file_info['file_path'], True
+    
+    # Lê o corpo uma única vez: JSON apenas quando o Content-Type indica JSON
+    body = (request.get_json(silent=True, cache=False) if request.is_json else None) or {}
+    if 'path' in body:
+        # Opção 2: Arquivo já existe no servidor
+        logger.info("Processando arquivo existente no servidor%s", context)
+        
+        file_path = body['path']
+        
+        # Se path é um diretório e filename está presente
+        if 'filename' in body:
+            file_path = os.path.join(file_path, body['filename'])
+        
+        file_info = file_service.validate_existing_file(file_path)
+        return file_info, file_info['file_path'], False
+    
+    return None, None, False
+
+
+def _run_pdf_job(job: Callable[..., Dict[str, Any]], *job_args,
+                 context: str = '', in_memory: bool = False):
+    """
+    Resolve o PDF da requisição e executa o job, de forma síncrona ou em segundo plano.
+    
+    Uploads gravados em disco são removidos ao final, exceto quando o job
+    é enfileirado: nesse caso a remoção fica a cargo do JobService.
+    """
+    file_info, file_path, is_upload = _resolve_input(context, in_memory)
+    if file_info is None:
+        return _prebuilt_response(_NO_FILE_ERROR, 400)
+    
+    try:
+        # Conversão em segundo plano: responde 202 com o id do job
+        if _wants_async():
+            response = _enqueue_job(
+                job, file_info, file_path, is_upload, *job_args,
+                cleanup_path=file_path if is_upload else None
+            )
+            is_upload = False  # o arquivo passa a ser removido pelo job
+            return response
+        
+        response_data = job(file_info, file_path, is_upload, *job_args)
+        if isinstance(response_data, Response):
+            # Jobs em streaming montam a própria resposta
+            return response_data
+        
+        # orjson: serialização em C do markdown (potencialmente vários MB)
+        return json_response(create_response(True, response_data))
+        
+    finally:
+        # Limpa arquivo temporário se foi um upload gravado em disco
+        if file_path and is_upload:
+            file_service.cleanup_file(file_path)
+
+
+def _handle_pdf_errors(action: str, conversion_code: str = "CONVERSION_ERROR"):
+    """
+    Decorator que traduz as exceções dos endpoints de PDF para respostas JSON.
+    
+    Args:
+        action: Descrição da operação usada nas mensagens (ex.: "conversão")
+        conversion_code: Código reportado para ConversionError
+    """
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                return f(*args, **kwargs)
+                
+            except ValidationError as e:
+                logger.warning("Erro de validação: %s", e)
+                return json_response(create_response(
+                    False,
+                    error=str(e),
+                    code="VALIDATION_ERROR"
+                ), 400)
+                
+            except SecurityError as e:
+                logger.warning("Erro de segurança: %s", e)
+                return json_response(create_response(
+                    False,
+                    error=str(e),
+                    code="SECURITY_ERROR"
+                ), 400)
+                
+            except ConversionError as e:
+                logger.error("Erro de %s: %s", action, e)
+                return json_response(create_response(
+                    False,
+                    error=str(e),
+                    code=conversion_code
+                ), 422)
+                
+            except PDFDigestException as e:
+                logger.error("Erro do PDF Digest: %s", e)
+                return json_response(create_response(
+                    False,
+                    error=e.message,
+                    code=e.code,
+                    details=e.details
+                ), 500)
+                
+            except Exception as e:
+                logger.exception("Erro inesperado durante %s: %s", action, e)
+                return json_response(create_response(
+                    False,
+                    error=f"Erro inesperado durante {action}",
+                    code="UNEXPECTED_ERROR",
+                    details={'error': str(e)}
+                ), 500)
+        
+        return decorated_function
+    
+    return decorator
+
+
+def _convert_job(file_info: Dict[str, Any], file_path: str, validated: bool) -> Dict[str, Any]:
+    """Converte o arquivo para Markdown e monta os dados da resposta de /convert."""
+    # Mesmo conteúdo já convertido: o cache dispensa validação e docling
+    conversion_result = pdf_service.get_cached_markdown(file_info['file_hash'])
+    cached = conversion_result is not None
+    
+    # Executa a conversão
+    if cached:
+        file_info.pop('content', None)
+    elif 'content' in file_info:
+        # Uploads já foram validados pelo FileService
+        logger.info("Iniciando conversão do upload: %s", file_info['original_filename'])
+        conversion_result = pdf_service.convert_bytes_to_markdown(
+            file_info.pop('content'), filename=file_info['original_filename'],
+            file_hash=file_info['file_hash'], cache_checked=True
+        )
+    else:
+        logger.info("Iniciando conversão do arquivo: %s", file_path)
+        # Uploads em streaming já foram validados pelo FileService
+        conversion_result = pdf_service.convert_pdf_to_markdown(
+            file_path, file_hash=file_info['file_hash'], validate=not validated,
+            cache_checked=True
+        )
+    
+    pages_count = len(conversion_result)
+    
+    # Prepara resposta de sucesso
+    response_data = {
+        'pages': conversion_result,
+        'file_info': {
+            'filename': file_info.get('filename', file_info.get('original_filename')),
+            'size_bytes': file_info['file_size'],
+            'size_formatted': file_info['file_size_formatted'],
+            'hash': file_info['file_hash'],
+            'pages_count': pages_count
+        },
+        'processing_info': {
+            'device': str(pdf_service.device),
+            'cached': cached
+        }
+    }
+    
+    logger.info("Conversão concluída com sucesso: %s páginas", pages_count)
+    
+    return response_data
+
+
+def _stream_convert_job(file_info: Dict[str, Any], file_path: str, validated: bool) -> Response:
+    """
+    Converte o arquivo e envia as páginas em NDJSON, uma por linha.
+    
+    A primeira linha traz file_info e processing_info; cada linha seguinte
+    é um objeto {"page", "markdown"}.
+    """
+    response_data = _convert_job(file_info, file_path, validated)
+    pages = response_data.pop('pages')
+    
+    def generate():
+        yield orjson.dumps(response_data) + b'\n'
+        for number, markdown in pages.items():
+            yield orjson.dumps({'page': number, 'markdown': markdown}) + b'\n'
+    
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+def _save_tables_job(tables_result: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    """Salva as tabelas em arquivos e acrescenta as URLs de download de cada um."""
+    saved_files = pdf_service.save_tables_to_files(tables_result, output_dir)
+    saved_files['download_urls'] = {
+        table_format: [
+            f"{api_bp.url_prefix}/tables/{quote(os.path.relpath(path, TABLES_OUTPUT_DIR))}"
+            for path in paths
+        ]
+        for table_format, paths in saved_files.items()
+    }
+    return saved_files
+
+
+def _extract_tables_job(file_info: Dict[str, Any], file_path: str, validated: bool,
+                        export_format: str, save_files: bool) -> Dict[str, Any]:
+    """Extrai as tabelas do arquivo e monta os dados da resposta de /extract-tables."""
+    # Mesmo conteúdo e formato já extraídos: o cache dispensa validação e docling
+    tables_result = pdf_service.get_cached_tables(file_info['file_hash'], export_format)
+    cached = tables_result is not None
+    
+    # Executa a extração avançada de tabelas
+    if not cached:
+        logger.info("Iniciando extração de tabelas: %s (formato: %s)", file_path, export_format)
+        tables_result = pdf_service.extract_tables_advanced(
+            file_path, export_format, file_hash=file_info['file_hash'], validate=not validated,
+            cache_checked=True
+        )
+    
+    # Salva arquivos se solicitado, em segundo plano: a gravação não atrasa a resposta
+    saved_files = {}
+    if save_files and tables_result['tables']:
+        try:
+            # Cria diretório baseado no nome do arquivo
+            base_name = Path(file_info.get('filename', 'unknown')).stem
+            output_dir = f"{TABLES_OUTPUT_DIR}/{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            job_id = job_service.submit(_save_tables_job, tables_result, output_dir)
+            logger.info("Gravação das tabelas enfileirada: job %s (%s)", job_id, output_dir)
+            saved_files = {
+                'status': 'pending',
+                'output_dir': output_dir,
+                'job_id': job_id,
+                'status_url': f"{api_bp.url_prefix}/jobs/{job_id}"
+            }
+        except Exception as e:
+            logger.warning("Erro ao salvar arquivos: %s", e)
+            saved_files = {'error': str(e)}
+    
+    # Prepara resposta de sucesso
+    response_data = {
+        'tables': tables_result['tables'],
+        'metadata': tables_result['metadata'],
+        'file_info': {
+            'filename': file_info.get('filename', file_info.get('original_filename')),
+            'size_bytes': file_info['file_size'],
+            'size_formatted': file_info['file_size_formatted'],
+            'hash': file_info['file_hash']
+        },
+        'export_info': {
+            'format': export_format,
+            'files_saved': save_files,
+            'saved_files': saved_files if save_files else None
+        },
+        'processing_info': {
+            'cached': cached
+        }
+    }
+    
+    logger.info("Extração de tabelas concluída: %s tabelas encontradas", tables_result['metadata']['total_tables'])
+    
+    return response_data
+
+
+def _stream_tables_job(file_info: Dict[str, Any], file_path: str, validated: bool,
+                       export_format: str) -> Response:
+    """
+    Extrai as tabelas do arquivo e as envia em NDJSON à medida que são exportadas.
+    
+    A primeira linha traz metadata e file_info; cada linha seguinte é uma tabela.
+    """
+    logger.info("Iniciando extração de tabelas em streaming: %s (formato: %s)", file_path, export_format)
+    metadata, tables = pdf_service.iter_tables_advanced(
+        file_path, export_format, file_hash=file_info['file_hash'], validate=not validated
+    )
+    header = {
+        'metadata': metadata,
+        'file_info': {
+            'filename': file_info.get('filename', file_info.get('original_filename')),
+            'size_bytes': file_info['file_size'],
+            'size_formatted': file_info['file_size_formatted'],
+            'hash': file_info['file_hash']
+        }
+    }
+    
+    def generate():
+        yield orjson.dumps(header) + b'\n'
+        for table in tables:
+            yield orjson.dumps(table) + b'\n'
+    
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+def _convert_enhanced_job(file_info: Dict[str, Any], file_path: str, validated: bool,
+                          include_tables: bool, table_format: str) -> Dict[str, Any]:
+    """Converte o arquivo e extrai tabelas, montando os dados da resposta de /convert-enhanced."""
+    logger.info("Iniciando conversão avançada: %s", file_path)
+    
+    # Mesmo conteúdo já processado: o cache dispensa validação e docling
+    # (sem o markdown o docling roda de qualquer forma, então as tabelas nem são consultadas)
+    markdown_result = pdf_service.get_cached_markdown(file_info['file_hash'])
+    tables_result = None
+    if include_tables and markdown_result is not None:
+        tables_result = pdf_service.get_cached_tables(file_info['file_hash'], table_format)
+    cached = markdown_result is not None and (tables_result is not None or not include_tables)
+    
+    # Cache já consultado acima: os serviços não repetem a consulta
+    if not cached and include_tables:
+        # Markdown e tabelas a partir de uma única execução do docling
+        logger.info("Extraindo tabelas em formato %s", table_format)
+        markdown_result, tables_result = pdf_service.convert_and_extract_tables(
+            file_path, table_format, file_hash=file_info['file_hash'], validate=not validated,
+            cache_checked=True
+        )
+    elif not cached:
+        markdown_result = pdf_service.convert_pdf_to_markdown(
+            file_path, file_hash=file_info['file_hash'], validate=not validated,
+            cache_checked=True
+        )
+    
+    pages_count = len(markdown_result)
+    
+    # Prepara resposta de sucesso
+    response_data = {
+        'markdown': {
+            'pages': markdown_result,
+            'pages_count': pages_count
+        },
+        'tables': tables_result if include_tables else None,
+        'file_info': {
+            'filename': file_info.get('filename', file_info.get('original_filename')),
+            'size_bytes': file_info['file_size'],
+            'size_formatted': file_info['file_size_formatted'],
+            'hash': file_info['file_hash']
+        },
+        'processing_info': {
+            'device': str(pdf_service.device),
+            'markdown_extraction': True,
+            'table_extraction': include_tables,
+            'table_format': table_format if include_tables else None,
+            'cached': cached
+        }
+    }
+    
+    total_tables = tables_result['metadata']['total_tables'] if tables_result else 0
+    logger.info("Conversão avançada concluída: %s páginas, %s tabelas", pages_count, total_tables)
+    
+    return response_data
+
 
 @api_bp.route('/health', methods=['GET'])
 def health_check() -> Dict[str, Any]:
@@ -34,14 +585,23 @@ def health_check() -> Dict[str, Any]:
     logger.debug("Verificação de saúde solicitada")
     
     try:
+        # Sondagens em cache curto: scrapes frequentes não repetem syscalls e PINGs
+        # (disco e memória já são memorizados por 1 s em helpers)
+        disk_usage = get_disk_usage()
+        memory_usage = get_memory_usage()
+        # A disponibilidade de GPU não muda com o processo em execução
+        device_info = _cached_probe('device', pdf_service.get_device_info, float('inf'))
+        
+        cache_snapshot = _cached_probe('cache', cache_service.health_snapshot, CACHE_PROBE_TTL)
+        
         # Testa componentes críticos
         checks = {
             'api': True,
             'pdf_service': True,
-            'cache': cache_service.test_connection(),
-            'disk_space': get_disk_usage() < 90,
-            'memory_usage': get_memory_usage() < 85,
-            'gpu_available': pdf_service.get_device_info()['gpu_available']
+            'cache': cache_snapshot['alive'],
+            'disk_space': disk_usage < 90,
+            'memory_usage': memory_usage < 85,
+            'gpu_available': device_info['gpu_available']
         }
         
         # Status geral
@@ -49,32 +609,34 @@ def health_check() -> Dict[str, Any]:
         
         response_data = {
             'status': overall_status,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': utcnow_iso(),
             'version': '1.0.0',
             'checks': checks,
             'system_info': {
-                'disk_usage_percent': round(get_disk_usage(), 2),
-                'memory_usage_percent': round(get_memory_usage(), 2),
-                'upload_folder': settings.upload_folder,
-                'max_file_size_mb': settings.max_content_length / (1024 * 1024)
+                'disk_usage_percent': round(disk_usage, 2),
+                'memory_usage_percent': round(memory_usage, 2),
+                'cache_keys': cache_snapshot.get('keys'),
+                'cache_used_memory': cache_snapshot.get('used_memory'),
+                **HEALTH_STATIC_INFO
             }
         }
         
         status_code = 200 if overall_status == 'healthy' else 503
-        return jsonify(create_response(True, response_data)), status_code
+        return json_response(create_response(True, response_data), status_code)
         
     except Exception as e:
-        logger.error(f"Erro durante verificação de saúde: {e}")
-        return jsonify(create_response(
+        logger.error("Erro durante verificação de saúde: %s", e)
+        return json_response(create_response(
             False, 
             error="Erro durante verificação de saúde",
             code="HEALTH_CHECK_ERROR",
             details={'error': str(e)}
-        )), 500
+        ), 500)
 
 
 @api_bp.route('/convert', methods=['POST'])
 @rate_limit_middleware()
+@_handle_pdf_errors("conversão")
 def convert_pdf() -> Dict[str, Any]:
     """
     Endpoint para converter um arquivo PDF para Markdown.
@@ -83,120 +645,98 @@ def convert_pdf() -> Dict[str, Any]:
     1. Upload de arquivo via multipart/form-data
     2. JSON com caminho do arquivo no servidor
     
+    Query parameters:
+    - stream: Se deve responder em NDJSON, uma página por linha (true/false) -
+      padrão: false; também ativado por Accept: application/x-ndjson.
+      Ignorado com async=true
+    
     Returns:
         Dict com resultado da conversão ou erro
     """
-    logger.info(f"Nova requisição de conversão: {request.method} {request.path}")
+    logger.info("Nova requisição de conversão: %s %s", request.method, request.path)
     
-    file_info = None
-    temp_file_path = None
+    # Streaming: cada página é serializada e enviada separadamente
+    if _wants_ndjson() and not _wants_async():
+        return _run_pdf_job(_stream_convert_job, in_memory=True)
     
-    try:
-        # Determina o tipo de requisição e processa o arquivo
-        if request.files and 'file' in request.files:
-            # Opção 1: Upload de arquivo
-            logger.info("Processando upload de arquivo")
-            uploaded_file = request.files['file']
-            
-            file_info = file_service.save_uploaded_file(uploaded_file)
-            temp_file_path = file_info['file_path']
-            
-        elif request.json and 'path' in request.json:
-            # Opção 2: Arquivo já existe no servidor
-            logger.info("Processando arquivo existente no servidor")
-            
-            file_path = request.json['path']
+    return _run_pdf_job(_convert_job, in_memory=True)
+
+
+@api_bp.route('/convert-batch', methods=['POST'])
+@rate_limit_middleware()
+def convert_pdf_batch() -> Dict[str, Any]:
+    """
+    Endpoint para converter vários PDFs enviados em uma única requisição.
+    
+    Aceita um upload multipart/form-data com um arquivo por campo
+    (ex.: file0, file1, ...). Cada arquivo é processado de forma
+    independente: a falha de um não interrompe os demais.
+    
+    Returns:
+        Dict com a lista de resultados por arquivo, na ordem de envio
+    """
+    logger.info("Nova requisição de conversão em lote: %s %s", request.method, request.path)
+    
+    uploaded_files = list(request.files.values()) if request.files else []
+    if not uploaded_files:
+        return _prebuilt_response(_NO_BATCH_FILES_ERROR, 400)
+    
+    results = []
+    for uploaded_file in uploaded_files:
+        try:
+            # Lido em memória, como no /convert: nada a gravar nem a remover depois
+            file_info = file_service.read_uploaded_file(uploaded_file)
+            conversion_result = pdf_service.convert_bytes_to_markdown(
+                file_info.pop('content'), filename=file_info['original_filename'],
+                file_hash=file_info['file_hash']
+            )
             
-            # Se path é um diretório e filename está presente
-            if 'filename' in request.json:
-                file_path = os.path.join(file_path, request.json['filename'])
+            results.append({
+                'success': True,
+                'pages': conversion_result,
+                'file_info': {
+                    'filename': file_info['original_filename'],
+                    'size_bytes': file_info['file_size'],
+                    'size_formatted': file_info['file_size_formatted'],
+                    'hash': file_info['file_hash'],
+                    'pages_count': len(conversion_result)
+                }
+            })
             
-            file_info = file_service.validate_existing_file(file_path)
-            temp_file_path = file_info['file_path']
+        except PDFDigestException as e:
+            logger.warning("Falha ao converter %s no lote: %s", uploaded_file.filename, e)
+            results.append({
+                'success': False,
+                'filename': uploaded_file.filename,
+                'error': e.message,
+                'code': e.code or BATCH_ERROR_CODES.get(type(e), 'PDF_DIGEST_ERROR')
+            })
             
-        else:
-            return jsonify(create_response(
-                False,
-                error="Nenhum arquivo fornecido",
-                code="NO_FILE_PROVIDED",
-                details={
-                    'instructions': 'Envie um arquivo PDF no campo "file" ou forneça "path" no JSON'
-                }
-            )), 400
-        
-        # Executa a conversão
-        logger.info(f"Iniciando conversão do arquivo: {temp_file_path}")
-        conversion_result = pdf_service.convert_pdf_to_markdown(temp_file_path)
-        
-        # Prepara resposta de sucesso
-        response_data = {
-            'pages': conversion_result,
-            'file_info': {
-                'filename': file_info.get('filename', file_info.get('original_filename')),
-                'size_bytes': file_info['file_size'],
-                'size_formatted': file_info['file_size_formatted'],
-                'hash': file_info['file_hash'],
-                'pages_count': len(conversion_result)
-            },
-            'processing_info': {
-                'device': str(pdf_service.device),
-                'cached': False  # TODO: Implementar detecção de cache
-            }
+        except Exception as e:
+            logger.exception("Erro inesperado ao converter %s no lote: %s", uploaded_file.filename, e)
+            results.append({
+                'success': False,
+                'filename': uploaded_file.filename,
+                'error': "Erro inesperado durante conversão",
+                'code': "UNEXPECTED_ERROR"
+            })
+    
+    succeeded = sum(1 for result in results if result['success'])
+    logger.info("Conversão em lote concluída: %s/%s arquivos convertidos", succeeded, len(results))
+    
+    return json_response(create_response(True, {
+        'results': results,
+        'total_files': len(results),
+        'succeeded': succeeded,
+        'processing_info': {
+            'device': str(pdf_service.device)
         }
-        
-        logger.info(f"Conversão concluída com sucesso: {len(conversion_result)} páginas")
-        return jsonify(create_response(True, response_data))
-        
-    except ValidationError as e:
-        logger.warning(f"Erro de validação: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="VALIDATION_ERROR"
-        )), 400
-        
-    except SecurityError as e:
-        logger.warning(f"Erro de segurança: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="SECURITY_ERROR"
-        )), 400
-        
-    except ConversionError as e:
-        logger.error(f"Erro de conversão: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="CONVERSION_ERROR"
-        )), 422
-        
-    except PDFDigestException as e:
-        logger.error(f"Erro do PDF Digest: {e}")
-        return jsonify(create_response(
-            False,
-            error=e.message,
-            code=e.code,
-            details=e.details
-        )), 500
-        
-    except Exception as e:
-        logger.exception(f"Erro inesperado durante conversão: {e}")
-        return jsonify(create_response(
-            False,
-            error="Erro inesperado durante conversão",
-            code="UNEXPECTED_ERROR",
-            details={'error': str(e)}
-        )), 500
-        
-    finally:
-        # Limpa arquivo temporário se foi um upload
-        if temp_file_path and 'uploaded_file' in locals():
-            file_service.cleanup_file(temp_file_path)
+    }))
 
 
 @api_bp.route('/extract-tables', methods=['POST'])
 @rate_limit_middleware()
+@_handle_pdf_errors("extração de tabelas", conversion_code="EXTRACTION_ERROR")
 def extract_tables() -> Dict[str, Any]:
     """
     Endpoint para extração avançada de tabelas de PDFs.
@@ -207,149 +747,40 @@ def extract_tables() -> Dict[str, Any]:
     
     Query parameters:
     - format: Formato de export ('json', 'csv', 'excel', 'html') - padrão: 'json'
-    - save_files: Se deve salvar arquivos (true/false) - padrão: false
+    - save_files: Se deve salvar arquivos (true/false) - padrão: false; a gravação
+      ocorre em segundo plano e a lista de arquivos é obtida em export_info.saved_files.status_url
+    - stream: Se deve responder em NDJSON, uma tabela por linha (true/false) -
+      padrão: false; também ativado por Accept: application/x-ndjson.
+      Ignorado com async=true ou save_files=true
     
     Returns:
         Dict com tabelas extraídas em formato estruturado
     """
-    logger.info(f"Nova requisição de extração de tabelas: {request.method} {request.path}")
+    logger.info("Nova requisição de extração de tabelas: %s %s", request.method, request.path)
     
-    file_info = None
-    temp_file_path = None
+    # Obtém parâmetros da query string
+    table_args = _parse_table_args()
     
-    try:
-        # Obtém parâmetros da query string
-        export_format = request.args.get('format', 'json').lower()
-        save_files = request.args.get('save_files', 'false').lower() == 'true'
-        
-        # Valida formato de export
-        valid_formats = ['json', 'csv', 'excel', 'html']
-        if export_format not in valid_formats:
-            return jsonify(create_response(
-                False,
-                error=f"Formato inválido: {export_format}. Formatos válidos: {', '.join(valid_formats)}",
-                code="INVALID_FORMAT"
-            )), 400
-        
-        # Determina o tipo de requisição e processa o arquivo
-        if request.files and 'file' in request.files:
-            # Opção 1: Upload de arquivo
-            logger.info("Processando upload de arquivo para extração de tabelas")
-            uploaded_file = request.files['file']
-            
-            file_info = file_service.save_uploaded_file(uploaded_file)
-            temp_file_path = file_info['file_path']
-            
-        elif request.json and 'path' in request.json:
-            # Opção 2: Arquivo já existe no servidor
-            logger.info("Processando arquivo existente para extração de tabelas")
-            
-            file_path = request.json['path']
-            
-            # Se path é um diretório e filename está presente
-            if 'filename' in request.json:
-                file_path = os.path.join(file_path, request.json['filename'])
-            
-            file_info = file_service.validate_existing_file(file_path)
-            temp_file_path = file_info['file_path']
-            
-        else:
-            return jsonify(create_response(
-                False,
-                error="Nenhum arquivo fornecido",
-                code="NO_FILE_PROVIDED",
-                details={
-                    'instructions': 'Envie um arquivo PDF no campo "file" ou forneça "path" no JSON'
-                }
-            )), 400
-        
-        # Executa a extração avançada de tabelas
-        logger.info(f"Iniciando extração de tabelas: {temp_file_path} (formato: {export_format})")
-        tables_result = pdf_service.extract_tables_advanced(temp_file_path, export_format)
-        
-        # Salva arquivos se solicitado
-        saved_files = {}
-        if save_files and tables_result['tables']:
-            try:
-                # Cria diretório baseado no nome do arquivo
-                base_name = Path(file_info.get('filename', 'unknown')).stem
-                output_dir = f"tables_output/{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                saved_files = pdf_service.save_tables_to_files(tables_result, output_dir)
-                logger.info(f"Tabelas salvas em arquivos: {output_dir}")
-            except Exception as e:
-                logger.warning(f"Erro ao salvar arquivos: {e}")
-                saved_files = {'error': str(e)}
-        
-        # Prepara resposta de sucesso
-        response_data = {
-            'tables': tables_result['tables'],
-            'metadata': tables_result['metadata'],
-            'file_info': {
-                'filename': file_info.get('filename', file_info.get('original_filename')),
-                'size_bytes': file_info['file_size'],
-                'size_formatted': file_info['file_size_formatted'],
-                'hash': file_info['file_hash']
-            },
-            'export_info': {
-                'format': export_format,
-                'files_saved': save_files,
-                'saved_files': saved_files if save_files else None
-            }
-        }
-        
-        logger.info(f"Extração de tabelas concluída: {len(tables_result['tables'])} tabelas encontradas")
-        return jsonify(create_response(True, response_data))
-        
-    except ValidationError as e:
-        logger.warning(f"Erro de validação: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="VALIDATION_ERROR"
-        )), 400
-        
-    except SecurityError as e:
-        logger.warning(f"Erro de segurança: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="SECURITY_ERROR"
-        )), 400
-        
-    except ConversionError as e:
-        logger.error(f"Erro de extração: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="EXTRACTION_ERROR"
-        )), 422
-        
-    except PDFDigestException as e:
-        logger.error(f"Erro do PDF Digest: {e}")
-        return jsonify(create_response(
-            False,
-            error=e.message,
-            code=e.code,
-            details=e.details
-        )), 500
-        
-    except Exception as e:
-        logger.exception(f"Erro inesperado durante extração de tabelas: {e}")
-        return jsonify(create_response(
+    # Valida formato de export
+    if table_args.format not in VALID_TABLE_FORMATS:
+        return json_response(create_response(
             False,
-            error="Erro inesperado durante extração de tabelas",
-            code="UNEXPECTED_ERROR",
-            details={'error': str(e)}
-        )), 500
-        
-    finally:
-        # Limpa arquivo temporário se foi um upload
-        if temp_file_path and 'uploaded_file' in locals():
-            file_service.cleanup_file(temp_file_path)
+            error=f"Formato inválido: {table_args.format}. Formatos válidos: {TABLE_FORMATS_LABEL}",
+            code="INVALID_FORMAT"
+        ), 400)
+    
+    # Streaming: as tabelas saem à medida que são exportadas, sem montar a resposta inteira
+    if _wants_ndjson() and not table_args.save_files and not _wants_async():
+        return _run_pdf_job(_stream_tables_job, table_args.format,
+                            context=" para extração de tabelas")
+    
+    return _run_pdf_job(_extract_tables_job, table_args.format, table_args.save_files,
+                        context=" para extração de tabelas")
 
 
 @api_bp.route('/convert-enhanced', methods=['POST'])
 @rate_limit_middleware()
+@_handle_pdf_errors("conversão avançada")
 def convert_pdf_enhanced() -> Dict[str, Any]:
     """
     Endpoint para conversão avançada de PDF com extração de tabelas em separado.
@@ -363,145 +794,55 @@ def convert_pdf_enhanced() -> Dict[str, Any]:
     Returns:
         Dict com markdown e tabelas extraídas
     """
-    logger.info(f"Nova requisição de conversão avançada: {request.method} {request.path}")
+    logger.info("Nova requisição de conversão avançada: %s %s", request.method, request.path)
     
-    file_info = None
-    temp_file_path = None
+    # Obtém parâmetros da query string
+    table_args = _parse_table_args('table_format')
     
-    try:
-        # Obtém parâmetros da query string
-        include_tables = request.args.get('include_tables', 'true').lower() == 'true'
-        table_format = request.args.get('table_format', 'json').lower()
-        
-        # Valida formato de tabela
-        valid_formats = ['json', 'csv', 'excel', 'html']
-        if include_tables and table_format not in valid_formats:
-            return jsonify(create_response(
-                False,
-                error=f"Formato de tabela inválido: {table_format}. Formatos válidos: {', '.join(valid_formats)}",
-                code="INVALID_TABLE_FORMAT"
-            )), 400
-        
-        # Determina o tipo de requisição e processa o arquivo
-        if request.files and 'file' in request.files:
-            # Opção 1: Upload de arquivo
-            logger.info("Processando upload de arquivo para conversão avançada")
-            uploaded_file = request.files['file']
-            
-            file_info = file_service.save_uploaded_file(uploaded_file)
-            temp_file_path = file_info['file_path']
-            
-        elif request.json and 'path' in request.json:
-            # Opção 2: Arquivo já existe no servidor
-            logger.info("Processando arquivo existente para conversão avançada")
-            
-            file_path = request.json['path']
-            
-            # Se path é um diretório e filename está presente
-            if 'filename' in request.json:
-                file_path = os.path.join(file_path, request.json['filename'])
-            
-            file_info = file_service.validate_existing_file(file_path)
-            temp_file_path = file_info['file_path']
-            
-        else:
-            return jsonify(create_response(
-                False,
-                error="Nenhum arquivo fornecido",
-                code="NO_FILE_PROVIDED",
-                details={
-                    'instructions': 'Envie um arquivo PDF no campo "file" ou forneça "path" no JSON'
-                }
-            )), 400
-        
-        # Executa conversão tradicional para Markdown
-        logger.info(f"Iniciando conversão avançada: {temp_file_path}")
-        markdown_result = pdf_service.convert_pdf_to_markdown(temp_file_path)
-        
-        # Executa extração de tabelas se solicitado
-        tables_result = None
-        if include_tables:
-            try:
-                logger.info(f"Extraindo tabelas em formato {table_format}")
-                tables_result = pdf_service.extract_tables_advanced(temp_file_path, table_format)
-            except Exception as e:
-                logger.warning(f"Erro na extração de tabelas: {e}")
-                tables_result = {
-                    'tables': [],
-                    'metadata': {'error': str(e), 'total_tables': 0}
-                }
-        
-        # Prepara resposta de sucesso
-        response_data = {
-            'markdown': {
-                'pages': markdown_result,
-                'pages_count': len(markdown_result)
-            },
-            'tables': tables_result if include_tables else None,
-            'file_info': {
-                'filename': file_info.get('filename', file_info.get('original_filename')),
-                'size_bytes': file_info['file_size'],
-                'size_formatted': file_info['file_size_formatted'],
-                'hash': file_info['file_hash']
-            },
-            'processing_info': {
-                'device': str(pdf_service.device),
-                'markdown_extraction': True,
-                'table_extraction': include_tables,
-                'table_format': table_format if include_tables else None
-            }
-        }
-        
-        total_tables = tables_result['metadata']['total_tables'] if tables_result else 0
-        logger.info(f"Conversão avançada concluída: {len(markdown_result)} páginas, {total_tables} tabelas")
-        return jsonify(create_response(True, response_data))
-        
-    except ValidationError as e:
-        logger.warning(f"Erro de validação: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="VALIDATION_ERROR"
-        )), 400
-        
-    except SecurityError as e:
-        logger.warning(f"Erro de segurança: {e}")
-        return jsonify(create_response(
-            False,
-            error=str(e),
-            code="SECURITY_ERROR"
-        )), 400
-        
-    except ConversionError as e:
-        logger.error(f"Erro de conversão: {e}")
-        return jsonify(create_response(
+    # Valida formato de tabela
+    if table_args.include_tables and table_args.format not in VALID_TABLE_FORMATS:
+        return json_response(create_response(
             False,
-            error=str(e),
-            code="CONVERSION_ERROR"
-        )), 422
-        
-    except PDFDigestException as e:
-        logger.error(f"Erro do PDF Digest: {e}")
-        return jsonify(create_response(
-            False,
-            error=e.message,
-            code=e.code,
-            details=e.details
-        )), 500
-        
-    except Exception as e:
-        logger.exception(f"Erro inesperado durante conversão avançada: {e}")
-        return jsonify(create_response(
-            False,
-            error="Erro inesperado durante conversão avançada",
-            code="UNEXPECTED_ERROR",
-            details={'error': str(e)}
-        )), 500
-        
-    finally:
-        # Limpa arquivo temporário se foi um upload
-        if temp_file_path and 'uploaded_file' in locals():
-            file_service.cleanup_file(temp_file_path)
+            error=f"Formato de tabela inválido: {table_args.format}. Formatos válidos: {TABLE_FORMATS_LABEL}",
+            code="INVALID_TABLE_FORMAT"
+        ), 400)
+    
+    return _run_pdf_job(_convert_enhanced_job, table_args.include_tables, table_args.format,
+                        context=" para conversão avançada")
+
+
+@api_bp.route('/tables/<output_name>/<filename>', methods=['GET'])
+def download_table(output_name: str, filename: str) -> Response:
+    """
+    Endpoint para baixar uma tabela salva com save_files=true.
+    
+    O arquivo é enviado via wsgi.file_wrapper (sendfile no Linux, quando o
+    servidor suporta), com suporte a requisições condicionais e parciais.
+    
+    Returns:
+        Arquivo da tabela como anexo
+    """
+    # send_from_directory rejeita caminhos fora do diretório (404)
+    return send_from_directory(
+        os.path.abspath(TABLES_OUTPUT_DIR), f"{output_name}/{filename}",
+        as_attachment=True, conditional=True
+    )
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Endpoint para consultar uma conversão em segundo plano.
+    
+    Returns:
+        Dict com o estado do job e, quando concluído, o resultado ou o erro
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        return _prebuilt_response(_JOB_NOT_FOUND_ERROR, 404)
+    
+    # orjson: o resultado pode conter vários MB de markdown
+    return json_response(create_response(True, job))
 
 
 @api_bp.route('/stats', methods=['GET'])
@@ -515,33 +856,42 @@ def get_stats() -> Dict[str, Any]:
     logger.debug("Solicitação de estatísticas")
     
     try:
+        # Sondagens independentes (statvfs, /proc, listagem do upload, INFO do Redis)
+        # executadas em paralelo: a latência passa a ser a da mais lenta
+        probes = _gather_probes({
+            'disk': get_disk_usage,
+            'memory': get_memory_usage,
+            'upload': file_service.get_upload_stats,
+            'cache': cache_service.get_stats
+        })
+        
         stats_data = {
             'system': {
-                'disk_usage_percent': round(get_disk_usage(), 2),
-                'memory_usage_percent': round(get_memory_usage(), 2),
-                'timestamp': datetime.utcnow().isoformat()
+                'disk_usage_percent': round(probes['disk'], 2),
+                'memory_usage_percent': round(probes['memory'], 2),
+                'timestamp': utcnow_iso()
             },
-            'upload': file_service.get_upload_stats(),
-            'cache': cache_service.get_stats(),
-            'device': pdf_service.get_device_info(),
+            'upload': probes['upload'],
+            'cache': probes['cache'],
+            'device': _cached_probe('device', pdf_service.get_device_info, float('inf')),
             'settings': {
-                'max_file_size_mb': settings.max_content_length / (1024 * 1024),
+                'max_file_size_mb': MAX_FILE_SIZE_MB,
                 'allowed_extensions': settings.allowed_extensions,
                 'cache_enabled': settings.cache_enabled,
                 'gpu_enabled': settings.gpu_enabled
             }
         }
         
-        return jsonify(create_response(True, stats_data))
+        return json_response(create_response(True, stats_data))
         
     except Exception as e:
-        logger.error(f"Erro ao obter estatísticas: {e}")
-        return jsonify(create_response(
+        logger.error("Erro ao obter estatísticas: %s", e)
+        return json_response(create_response(
             False,
             error="Erro ao obter estatísticas",
             code="STATS_ERROR",
             details={'error': str(e)}
-        )), 500
+        ), 500)
 
 
 @api_bp.route('/cache/clear', methods=['POST'])
@@ -559,25 +909,25 @@ def clear_cache() -> Dict[str, Any]:
         
         if success:
             logger.info("Cache limpo com sucesso")
-            return jsonify(create_response(
+            return json_response(create_response(
                 True,
                 {'message': 'Cache limpo com sucesso'}
             ))
         else:
-            return jsonify(create_response(
+            return json_response(create_response(
                 False,
                 error="Falha ao limpar cache",
                 code="CACHE_CLEAR_FAILED"
-            )), 500
+            ), 500)
             
     except Exception as e:
-        logger.error(f"Erro ao limpar cache: {e}")
-        return jsonify(create_response(
+        logger.error("Erro ao limpar cache: %s", e)
+        return json_response(create_response(
             False,
             error="Erro ao limpar cache",
             code="CACHE_ERROR",
             details={'error': str(e)}
-        )), 500
+        ), 500)
 
 
 @api_bp.route('/cleanup', methods=['POST'])
@@ -592,61 +942,64 @@ def cleanup_old_files() -> Dict[str, Any]:
     
     try:
         # Obtém parâmetro de idade máxima (padrão: 24 horas)
-        max_age_hours = request.json.get('max_age_hours', 24) if request.json else 24
+        body = (request.get_json(silent=True, cache=False) if request.is_json else None) or {}
+        max_age_hours = body.get('max_age_hours', 24)
         
-        if not isinstance(max_age_hours, (int, float)) or max_age_hours <= 0:
-            return jsonify(create_response(
-                False,
-                error="max_age_hours deve ser um número positivo",
-                code="INVALID_PARAMETER"
-            )), 400
+        if (not isinstance(max_age_hours, (int, float)) or isinstance(max_age_hours, bool)
+                or not 0 < max_age_hours <= MAX_CLEANUP_AGE_HOURS):
+            return _prebuilt_response(_INVALID_MAX_AGE_ERROR, 400)
         
         removed_count = file_service.cleanup_old_files(max_age_hours)
+        removed_dirs = file_service.cleanup_old_table_outputs(max_age_hours)
         
-        logger.info(f"Limpeza concluída: {removed_count} arquivos removidos")
-        return jsonify(create_response(
+        logger.info("Limpeza concluída: %s arquivos removidos", removed_count)
+        return json_response(create_response(
             True,
             {
                 'message': f'Limpeza concluída',
                 'removed_files': removed_count,
+                'removed_table_outputs': removed_dirs,
                 'max_age_hours': max_age_hours
             }
         ))
         
     except Exception as e:
-        logger.error(f"Erro durante limpeza: {e}")
-        return jsonify(create_response(
+        logger.error("Erro durante limpeza: %s", e)
+        return json_response(create_response(
             False,
             error="Erro durante limpeza",
             code="CLEANUP_ERROR",
             details={'error': str(e)}
-        )), 500
+        ), 500)
 
 
-@api_bp.route('/info', methods=['GET'])
-def get_info() -> Dict[str, Any]:
-    """
-    Endpoint para obter informações sobre a API.
-    
-    Returns:
-        Dict com informações da API
-    """
-    info_data = {
+def _build_info() -> Dict[str, Any]:
+    """Monta as informações da API, fixas enquanto o processo estiver em execução."""
+    return {
         'name': 'PDF Digest API',
         'version': '1.0.0',
         'description': 'API para conversão de PDFs em Markdown',
         'endpoints': {
             '/api/health': 'Verificação de saúde',
             '/api/convert': 'Conversão de PDF para Markdown',
+            '/api/convert-batch': 'Conversão de vários PDFs em uma requisição',
             '/api/extract-tables': 'Extração avançada de tabelas',
             '/api/convert-enhanced': 'Conversão avançada com tabelas',
+            '/api/tables/<output>/<file>': 'Download de tabelas salvas com save_files=true',
+            '/api/jobs/<job_id>': 'Estado de conversões em segundo plano (?async=true ou JOB_ASYNC_DEFAULT)',
             '/api/stats': 'Estatísticas do sistema',
             '/api/cache/clear': 'Limpeza de cache',
             '/api/cleanup': 'Limpeza de arquivos antigos',
             '/api/info': 'Informações da API'
         },
+        'upload_content_types': {
+            'multipart/form-data': 'Arquivo PDF no campo "file"',
+            'application/pdf': 'PDF no corpo da requisição (nome opcional em ?filename=)',
+            'application/octet-stream': 'PDF no corpo da requisição (nome opcional em ?filename=)',
+            'application/json': 'Caminho do arquivo no servidor em "path"'
+        },
         'limits': {
-            'max_file_size_mb': settings.max_content_length / (1024 * 1024),
+            'max_file_size_mb': MAX_FILE_SIZE_MB,
             'allowed_extensions': settings.allowed_extensions,
             'rate_limits': {
                 'per_minute': settings.rate_limit_per_minute,
@@ -655,5 +1008,18 @@ def get_info() -> Dict[str, Any]:
             }
         }
     }
+
+
+# Informações da API serializadas uma única vez (apenas o timestamp é inserido por requisição)
+_INFO_DATA = _prebuilt_data(_build_info())
+
+
+@api_bp.route('/info', methods=['GET'])
+def get_info() -> Dict[str, Any]:
+    """
+    Endpoint para obter informações sobre a API.
     
-    return jsonify(create_response(True, info_data)) 
\ No newline at end of file
+    Returns:
+        Dict com informações da API
+    """
+    return _prebuilt_response(_INFO_DATA, 200, success=True)
@@ -20,6 +20,8 @@ class Settings(BaseSettings):
     upload_folder: str = "uploads"
     max_content_length: int = 16 * 1024 * 1024  # 16MB
     allowed_extensions: list = ['.pdf']
+    stream_upload_min_size: int = 1024 * 1024  # Multipart a partir deste tamanho é lido em streaming
+    tables_output_folder: str = "tables_output"  # Tabelas salvas com save_files=true
     
     # Configurações de logging
     log_level: str = "INFO"
@@ -43,6 +45,17 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = 5
     rate_limit_per_hour: int = 50
     rate_limit_per_day: int = 200
+    rate_limit_max_clients: int = 100_000  # Identificadores mantidos em memória (LRU)
+    rate_limit_allowlist: list = []  # IPs isentos (ex.: monitoramento, warm-up interno)
+    
+    # Jobs em segundo plano (?async=true)
+    job_workers: int = 2
+    job_result_ttl: int = 3600  # 1 hora
+    job_async_default: bool = False  # Processa em segundo plano sem ?async=true (?wait=true força síncrono)
+    
+    # Limpeza periódica de uploads e tabelas salvas (0 desativa)
+    cleanup_interval_minutes: int = 15
+    cleanup_max_age_hours: int = 24
     
     # Configurações de monitoramento
     metrics_enabled: bool = True
@@ -2,6 +2,7 @@
 Script principal para iniciar o serviço de conversão de PDF para Markdown.
 """
 import argparse
+import os
 import sys
 import logging
 import logging.config
@@ -10,6 +11,7 @@ from pathlib import Path
 
 from src.config.settings import settings
 from src.api.app import create_app
+from src.services.cleanup_service import cleanup_service
 
 
 def setup_logging():
@@ -45,7 +47,7 @@ def setup_logging():
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         logger = logging.getLogger(__name__)
-        logger.error(f"Erro ao configurar logging: {e}")
+        logger.error("Erro ao configurar logging: %s", e)
 
 
 def main():
@@ -66,17 +68,21 @@ def main():
     
     try:
         logger.info("Iniciando PDF Digest API")
-        logger.info(f"Configurações: Host={args.host}, Port={args.port}, Debug={args.debug}")
-        logger.info(f"Upload folder: {settings.upload_folder}")
-        logger.info(f"Max file size: {settings.max_content_length / (1024 * 1024):.1f} MB")
-        logger.info(f"Cache enabled: {settings.cache_enabled}")
-        logger.info(f"GPU enabled: {settings.gpu_enabled}")
+        logger.info("Configurações: Host=%s, Port=%s, Debug=%s", args.host, args.port, args.debug)
+        logger.info("Upload folder: %s", settings.upload_folder)
+        logger.info("Max file size: %.1f MB", settings.max_content_length / (1024 * 1024))
+        logger.info("Cache enabled: %s", settings.cache_enabled)
+        logger.info("GPU enabled: %s", settings.gpu_enabled)
         
         # Cria e configura a aplicação Flask
         app = create_app()
         
+        # Limpeza periódica só no processo que serve (o reloader do debug reexecuta main)
+        if not args.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            cleanup_service.start()
+        
         # Inicia o servidor
-        logger.info(f"Iniciando servidor em {args.host}:{args.port}")
+        logger.info("Iniciando servidor em %s:%s", args.host, args.port)
         app.run(
             host=args.host,
             port=args.port,
@@ -88,7 +94,7 @@ def main():
         logger.info("Serviço interrompido pelo usuário")
         sys.exit(0)
     except Exception as e:
-        logger.error(f"Erro fatal durante inicialização: {e}")
+        logger.error("Erro fatal durante inicialização: %s", e)
         sys.exit(1)
 
 
@@ -1,8 +1,8 @@
 """
 Serviço de cache para o PDF Digest.
 """
-import json
 import logging
+import orjson
 import redis
 from typing import Optional, Dict, Any
 from src.config.settings import settings
@@ -14,6 +14,13 @@ logger = logging.getLogger(__name__)
 class CacheService:
     """Serviço de cache usando Redis."""
     
+    # Chaves de resultados de conversão; jobs e rate limit compartilham o banco
+    # e não podem ser apagados por clear_all
+    CACHE_KEY_PATTERNS = ('pdf_conversion:*', 'pdf_tables:*')
+    
+    # Chaves removidas por comando UNLINK em clear_all
+    CLEAR_BATCH_SIZE = 500
+    
     def __init__(self):
         """Inicializa a conexão com Redis."""
         self.enabled = settings.cache_enabled
@@ -27,11 +34,11 @@ class CacheService:
                 self.client.ping()
                 logger.info("Cache Redis conectado com sucesso")
             except redis.ConnectionError as e:
-                logger.warning(f"Não foi possível conectar ao Redis: {e}")
+                logger.warning("Não foi possível conectar ao Redis: %s", e)
                 logger.warning("Cache será desabilitado")
                 self.enabled = False
             except Exception as e:
-                logger.error(f"Erro inesperado ao configurar cache: {e}")
+                logger.error("Erro inesperado ao configurar cache: %s", e)
                 self.enabled = False
     
     def get(self, key: str) -> Optional[Dict[str, Any]]:
@@ -50,16 +57,16 @@ class CacheService:
         try:
             cached_data = self.client.get(key)
             if cached_data:
-                logger.debug(f"Cache hit para chave: {key}")
-                return json.loads(cached_data)
+                logger.debug("Cache hit para chave: %s", key)
+                return orjson.loads(cached_data)
             else:
-                logger.debug(f"Cache miss para chave: {key}")
+                logger.debug("Cache miss para chave: %s", key)
                 return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Erro ao decodificar dados do cache para chave {key}: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Erro ao decodificar dados do cache para chave %s: %s", key, e)
             return None
         except Exception as e:
-            logger.error(f"Erro ao recuperar do cache: {e}")
+            logger.error("Erro ao recuperar do cache: %s", e)
             return None
     
     def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> bool:
@@ -79,22 +86,22 @@ class CacheService:
         
         try:
             cache_ttl = ttl or self.ttl
-            serialized_value = json.dumps(value, ensure_ascii=False)
+            serialized_value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
             
             result = self.client.setex(key, cache_ttl, serialized_value)
             
             if result:
-                logger.debug(f"Valor armazenado no cache com chave: {key}, TTL: {cache_ttl}s")
+                logger.debug("Valor armazenado no cache com chave: %s, TTL: %ss", key, cache_ttl)
             else:
-                logger.warning(f"Falha ao armazenar no cache com chave: {key}")
+                logger.warning("Falha ao armazenar no cache com chave: %s", key)
             
             return result
             
-        except json.JSONEncodeError as e:
-            logger.error(f"Erro ao serializar dados para cache: {e}")
+        except orjson.JSONEncodeError as e:
+            logger.error("Erro ao serializar dados para cache: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Erro ao armazenar no cache: {e}")
+            logger.error("Erro ao armazenar no cache: %s", e)
             return False
     
     def delete(self, key: str) -> bool:
@@ -112,15 +119,19 @@ class CacheService:
         
         try:
             result = self.client.delete(key)
-            logger.debug(f"Chave removida do cache: {key}")
+            logger.debug("Chave removida do cache: %s", key)
             return bool(result)
         except Exception as e:
-            logger.error(f"Erro ao remover do cache: {e}")
+            logger.error("Erro ao remover do cache: %s", e)
             return False
     
     def clear_all(self) -> bool:
         """
-        Limpa todos os dados do cache.
+        Remove todos os resultados de conversão do cache.
+        
+        Usa SCAN + UNLINK apenas nos prefixos de CACHE_KEY_PATTERNS: um
+        FLUSHDB apagaria também os jobs em andamento e as janelas de rate
+        limit, que ficam no mesmo banco.
         
         Returns:
             True se limpeza foi bem-sucedida, False caso contrário
@@ -129,11 +140,20 @@ class CacheService:
             return False
         
         try:
-            self.client.flushdb()
-            logger.info("Cache limpo com sucesso")
+            removed = 0
+            for pattern in self.CACHE_KEY_PATTERNS:
+                batch = []
+                for key in self.client.scan_iter(match=pattern, count=self.CLEAR_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= self.CLEAR_BATCH_SIZE:
+                        removed += self.client.unlink(*batch)
+                        batch = []
+                if batch:
+                    removed += self.client.unlink(*batch)
+            logger.info("Cache limpo com sucesso: %s chaves removidas", removed)
             return True
         except Exception as e:
-            logger.error(f"Erro ao limpar cache: {e}")
+            logger.error("Erro ao limpar cache: %s", e)
             return False
     
     def get_stats(self) -> Dict[str, Any]:
@@ -147,9 +167,14 @@ class CacheService:
             return {'enabled': False}
         
         try:
-            info = self.client.info()
+            # INFO e DBSIZE em um único round-trip
+            pipe = self.client.pipeline(transaction=False)
+            pipe.info()
+            pipe.dbsize()
+            info, keys = pipe.execute()
             return {
                 'enabled': True,
+                'keys': keys,
                 'connected_clients': info.get('connected_clients', 0),
                 'used_memory': info.get('used_memory_human', '0B'),
                 'keyspace_hits': info.get('keyspace_hits', 0),
@@ -157,9 +182,38 @@ class CacheService:
                 'total_commands_processed': info.get('total_commands_processed', 0)
             }
         except Exception as e:
-            logger.error(f"Erro ao obter estatísticas do cache: {e}")
+            logger.error("Erro ao obter estatísticas do cache: %s", e)
             return {'enabled': True, 'error': str(e)}
     
+    def health_snapshot(self) -> Dict[str, Any]:
+        """
+        Verifica o Redis e coleta uso de memória e número de chaves.
+        
+        PING, INFO memory e DBSIZE vão em um único pipeline, ou seja,
+        um só round-trip ao servidor.
+        
+        Returns:
+            Dicionário com alive, keys e used_memory (alive False se
+            o cache estiver desabilitado ou inacessível)
+        """
+        if not self.enabled or not self.client:
+            return {'alive': False}
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.ping()
+            pipe.info('memory')
+            pipe.dbsize()
+            alive, info, keys = pipe.execute()
+            return {
+                'alive': bool(alive),
+                'keys': keys,
+                'used_memory': info.get('used_memory_human', '0B')
+            }
+        except Exception as e:
+            logger.error("Verificação do cache falhou: %s", e)
+            return {'alive': False, 'error': str(e)}
+    
     def test_connection(self) -> bool:
         """
         Testa a conexão com o Redis.
@@ -174,7 +228,7 @@ class CacheService:
             self.client.ping()
             return True
         except Exception as e:
-            logger.error(f"Teste de conexão do cache falhou: {e}")
+            logger.error("Teste de conexão do cache falhou: %s", e)
             return False
 
 
@@ -0,0 +1,119 @@
+"""
+Serviço de limpeza periódica para o PDF Digest.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import IO, Optional
+
+from src.config.settings import settings
+from src.services.file_service import file_service
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, cada processo limpa por conta própria
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class CleanupService:
+    """
+    Remove periodicamente uploads e tabelas salvas antigos.
+
+    Roda em uma thread daemon do processo, a cada
+    settings.cleanup_interval_minutes, removendo o que tiver mais de
+    settings.cleanup_max_age_hours; o endpoint /api/cleanup continua
+    disponível para limpezas manuais.
+
+    Cada worker do gunicorn inicia a sua thread, mas só o processo que
+    detém o flock de lock_path executa a limpeza; se ele terminar, outro
+    worker assume no intervalo seguinte.
+    """
+
+    def __init__(self):
+        """Inicializa o serviço sem iniciar a thread."""
+        self.interval = settings.cleanup_interval_minutes * 60
+        self.max_age_hours = settings.cleanup_max_age_hours
+        # Fora da pasta de upload, que a própria limpeza esvazia
+        folder_id = hashlib.sha1(settings.upload_folder.encode()).hexdigest()[:12]
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"pdf_digest_cleanup_{folder_id}.lock")
+        self._lock_file: Optional[IO] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """
+        Inicia a limpeza periódica, se habilitada e ainda não iniciada.
+
+        Returns:
+            True se a thread de limpeza estiver em execução
+        """
+        if self.interval <= 0:
+            logger.info("Limpeza periódica desativada")
+            return False
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._loop, name='periodic-cleanup', daemon=True
+                )
+                self._thread.start()
+                logger.info("Limpeza periódica iniciada: a cada %s min", self.interval // 60)
+        return True
+
+    def stop(self):
+        """Interrompe a limpeza periódica."""
+        self._stop.set()
+
+    def run_once(self):
+        """Remove uploads e diretórios de tabelas mais antigos que max_age_hours."""
+        file_service.cleanup_old_files(self.max_age_hours)
+        file_service.cleanup_old_table_outputs(self.max_age_hours)
+
+    def is_leader(self) -> bool:
+        """
+        Tenta obter (ou confirma) o lock exclusivo da limpeza entre processos.
+
+        Returns:
+            True se este processo deve executar a limpeza
+        """
+        if self._lock_file is not None or fcntl is None:
+            return True
+
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        logger.info("Processo %s assumiu a limpeza periódica", os.getpid())
+        return True
+
+    def _release(self):
+        """Libera o lock para que outro processo assuma a limpeza."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _loop(self):
+        """Executa a limpeza a cada intervalo até stop(), se este processo for o líder."""
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if self.is_leader():
+                        self.run_once()
+                except Exception as e:
+                    logger.error("Erro durante limpeza periódica: %s", e)
+        finally:
+            self._release()
+
+
+# Instância global do serviço de limpeza
+cleanup_service = CleanupService()
@@ -1,19 +1,60 @@
 """
 Serviço de gestão de arquivos para o PDF Digest.
 """
+import hashlib
 import os
+import shutil
+import stat
+import uuid
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
-from werkzeug.utils import secure_filename
+from typing import BinaryIO, Dict, Any, Optional, Tuple
 from werkzeug.datastructures import FileStorage
 
 from src.config.settings import settings
+from src.utils import bufpool
 from src.utils.exceptions import ValidationError, SecurityError, FileProcessingError
-from src.utils.helpers import clean_filename, calculate_file_hash, format_file_size
+from src.utils.helpers import calculate_file_hash, format_file_size
+
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import BaseTarget
+except ImportError:  # Parser em streaming é opcional; sem ele uploads usam request.files
+    StreamingFormDataParser = None
+    BaseTarget = object
 
 logger = logging.getLogger(__name__)
 
+# Tamanho dos blocos usados ao gravar uploads em disco (o mesmo dos buffers do pool)
+UPLOAD_CHUNK_SIZE = bufpool.BUFFER_SIZE
+
+
+class _HashingFileTarget(BaseTarget):
+    """Target do streaming-form-data que grava o campo em disco calculando hash e tamanho."""
+    
+    def __init__(self, file_path: str):
+        super().__init__()
+        self.file_path = file_path
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._file = None
+    
+    def on_start(self):
+        self._file = open(self.file_path, 'wb')
+    
+    def on_data_received(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        self._file.write(chunk)
+    
+    def on_finish(self):
+        self.close()
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 
 class FileService:
     """Serviço para gestão segura de arquivos."""
@@ -23,9 +64,8 @@ class FileService:
         self.upload_folder = settings.upload_folder
         self.max_size = settings.max_content_length
         self.allowed_extensions = settings.allowed_extensions
-        
-        # Garante que o diretório de upload existe
-        Path(self.upload_folder).mkdir(parents=True, exist_ok=True)
+        self.streaming_enabled = StreamingFormDataParser is not None
+        # O diretório de upload já é criado pelo validador de Settings
     
     def validate_file_security(self, file_path: str) -> bool:
         """
@@ -41,41 +81,118 @@ class FileService:
             SecurityError: Se detectada uma ameaça de segurança
         """
         try:
-            # Verifica se o arquivo existe
-            if not os.path.exists(file_path):
+            # Um único stat(2) cobre a existência e o tamanho do arquivo
+            try:
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
                 raise SecurityError(f"Arquivo não encontrado: {file_path}")
             
-            # Verifica tamanho do arquivo
-            file_size = os.path.getsize(file_path)
-            if file_size > self.max_size:
-                raise SecurityError(
-                    f"Arquivo muito grande: {format_file_size(file_size)}. "
-                    f"Máximo permitido: {format_file_size(self.max_size)}"
-                )
-            
-            if file_size == 0:
-                raise SecurityError("Arquivo está vazio")
-            
-            # Verifica header PDF manualmente
+            # Verifica tamanho e header PDF
             with open(file_path, 'rb') as f:
-                header = f.read(8)
-                if not header.startswith(b'%PDF-'):
-                    raise SecurityError("Arquivo não é um PDF válido (header inválido)")
+                self._check_pdf_content(file_size, f.read(8))
             
-            # Verifica se não há path traversal no nome do arquivo
-            normalized_path = os.path.normpath(file_path)
-            if '..' in normalized_path or normalized_path.startswith('/'):
+            # Verifica se não há path traversal no nome do arquivo (componentes '..');
+            # caminhos absolutos são legítimos aqui porque este método só recebe
+            # arquivos gravados pelo próprio serviço na pasta de upload (absoluta).
+            # Caminhos vindos do cliente passam antes por _confine_client_path
+            if '..' in Path(file_path).parts:
                 raise SecurityError("Path traversal detectado no nome do arquivo")
             
-            logger.info(f"Arquivo validado com sucesso: {file_path}")
+            logger.info("Arquivo validado com sucesso: %s", file_path)
             return True
             
         except SecurityError:
             raise
         except Exception as e:
-            logger.error(f"Erro durante validação de segurança: {e}")
+            logger.error("Erro durante validação de segurança: %s", e)
             raise SecurityError(f"Erro durante validação: {e}")
     
+    def _check_pdf_content(self, file_size: int, header: bytes) -> None:
+        """
+        Verifica tamanho e header de um PDF, em disco ou em memória.
+        
+        Raises:
+            SecurityError: Se o tamanho ou o header forem inválidos
+        """
+        if file_size > self.max_size:
+            raise SecurityError(
+                f"Arquivo muito grande: {format_file_size(file_size)}. "
+                f"Máximo permitido: {format_file_size(self.max_size)}"
+            )
+        
+        if file_size == 0:
+            raise SecurityError("Arquivo está vazio")
+        
+        if not header.startswith(b'%PDF-'):
+            raise SecurityError("Arquivo não é um PDF válido (header inválido)")
+    
+    def _validate_upload_name(self, file: FileStorage) -> str:
+        """
+        Valida o nome de um arquivo enviado.
+        
+        Returns:
+            Extensão do arquivo, em minúsculas
+            
+        Raises:
+            ValidationError: Se o nome ou a extensão forem inválidos
+        """
+        if not file or not file.filename:
+            raise ValidationError("Nenhum arquivo fornecido")
+        
+        return self._validate_extension(file.filename)
+    
+    def _validate_extension(self, filename: str) -> str:
+        """Retorna a extensão do arquivo, em minúsculas, se for permitida."""
+        file_ext = Path(filename).suffix.lower()
+        if file_ext not in self.allowed_extensions:
+            raise ValidationError(
+                f"Extensão não permitida: {file_ext}. "
+                f"Permitidas: {', '.join(self.allowed_extensions)}"
+            )
+        
+        return file_ext
+    
+    def read_uploaded_file(self, file: FileStorage) -> Dict[str, Any]:
+        """
+        Lê um arquivo enviado para a memória, sem gravá-lo em disco.
+        
+        Aplica as mesmas validações de save_uploaded_file; o conteúdo é
+        devolvido na chave 'content'. O tamanho já é limitado pelo
+        MAX_CONTENT_LENGTH do Flask antes de chegar aqui.
+        
+        Args:
+            file: Arquivo enviado
+            
+        Returns:
+            Dicionário com informações e conteúdo do arquivo
+            
+        Raises:
+            ValidationError: Se a validação falhar
+            SecurityError: Se detectada ameaça de segurança
+        """
+        try:
+            self._validate_upload_name(file)
+            
+            file.stream.seek(0)
+            content = file.stream.read()
+            file_size = len(content)
+            self._check_pdf_content(file_size, content[:8])
+            
+            return {
+                'original_filename': file.filename,
+                'content': content,
+                'file_size': file_size,
+                'file_size_formatted': format_file_size(file_size),
+                'file_hash': hashlib.sha256(content).hexdigest(),
+                'content_type': file.content_type
+            }
+            
+        except (ValidationError, SecurityError):
+            raise
+        except Exception as e:
+            logger.error("Erro inesperado ao ler arquivo: %s", e)
+            raise FileProcessingError(f"Erro ao ler arquivo: {e}")
+    
     def save_uploaded_file(self, file: FileStorage) -> Dict[str, Any]:
         """
         Salva um arquivo enviado com validações de segurança.
@@ -92,43 +209,23 @@ class FileService:
         """
         file_path = None
         try:
-            # Validações básicas
-            if not file or not file.filename:
-                raise ValidationError("Nenhum arquivo fornecido")
-            
-            if file.filename == '':
-                raise ValidationError("Nome do arquivo está vazio")
-            
-            # Verifica extensão
-            file_ext = Path(file.filename).suffix.lower()
-            if file_ext not in self.allowed_extensions:
-                raise ValidationError(
-                    f"Extensão não permitida: {file_ext}. "
-                    f"Permitidas: {', '.join(self.allowed_extensions)}"
-                )
+            # Validações de nome e extensão
+            file_ext = self._validate_upload_name(file)
             
-            # Limpa e protege o nome do arquivo
-            clean_name = clean_filename(file.filename)
-            secure_name = secure_filename(clean_name)
-            
-            # Gera nome único para evitar conflitos
-            timestamp = int(__import__('time').time())
-            unique_name = f"{timestamp}_{secure_name}"
+            # O nome original não entra no caminho: um UUID aleatório evita
+            # sanitização do nome enviado e colisões entre uploads
+            unique_name = f"{uuid.uuid4().hex}{file_ext}"
             
             # Caminho completo do arquivo
             file_path = os.path.join(self.upload_folder, unique_name)
             
-            # Salva o arquivo
-            file.save(file_path)
-            logger.info(f"Arquivo salvo: {file_path}")
+            # Salva o arquivo (hash e tamanho são calculados durante a gravação)
+            file_hash, file_size = self._write_upload(file, file_path)
+            logger.info("Arquivo salvo: %r -> %s", file.filename, file_path)
             
             # Valida segurança do arquivo salvo
             self.validate_file_security(file_path)
             
-            # Calcula informações do arquivo
-            file_size = os.path.getsize(file_path)
-            file_hash = calculate_file_hash(file_path)
-            
             return {
                 'original_filename': file.filename,
                 'saved_filename': unique_name,
@@ -141,20 +238,209 @@ class FileService:
             
         except (ValidationError, SecurityError):
             # Remove arquivo se foi salvo mas falhou na validação
-            if file_path and os.path.exists(file_path):
+            if file_path:
                 try:
                     os.remove(file_path)
-                    logger.info(f"Arquivo removido após falha na validação: {file_path}")
+                    logger.info("Arquivo removido após falha na validação: %s", file_path)
+                except FileNotFoundError:
+                    pass
                 except Exception as cleanup_error:
-                    logger.error(f"Erro ao remover arquivo após falha: {cleanup_error}")
+                    logger.error("Erro ao remover arquivo após falha: %s", cleanup_error)
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado ao salvar arquivo: {e}")
+            logger.error("Erro inesperado ao salvar arquivo: %s", e)
+            raise FileProcessingError(f"Erro ao salvar arquivo: {e}")
+    
+    def save_streamed_upload(self, stream: BinaryIO, content_type: str,
+                             field_name: str = 'file') -> Dict[str, Any]:
+        """
+        Salva o campo de arquivo de um corpo multipart lido direto do stream.
+        
+        O corpo é decodificado em blocos pelo streaming-form-data e gravado em
+        disco à medida que chega, sem passar pelo parser multipart do
+        Werkzeug (request.files) e sem manter o arquivo inteiro em memória.
+        
+        Args:
+            stream: Corpo da requisição (request.stream)
+            content_type: Content-Type da requisição, com o boundary
+            field_name: Nome do campo multipart com o arquivo
+            
+        Returns:
+            Dicionário com informações do arquivo salvo, como em save_uploaded_file
+            
+        Raises:
+            ValidationError: Se a validação falhar
+            SecurityError: Se detectada ameaça de segurança
+        """
+        staging_path = os.path.join(self.upload_folder, uuid.uuid4().hex)
+        file_path = None
+        target = None
+        try:
+            parser = StreamingFormDataParser(headers={'Content-Type': content_type})
+            target = _HashingFileTarget(staging_path)
+            parser.register(field_name, target)
+            
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b""):
+                parser.data_received(chunk)
+            
+            if target.multipart_filename is None:
+                raise ValidationError("Nenhum arquivo fornecido")
+            
+            original_filename = target.multipart_filename
+            file_ext = self._validate_extension(original_filename)
+            
+            # O nome só é conhecido após o parse: renomeia com a extensão validada
+            unique_name = os.path.basename(staging_path) + file_ext
+            file_path = os.path.join(self.upload_folder, unique_name)
+            os.rename(staging_path, file_path)
+            logger.info("Arquivo salvo em streaming: %r -> %s", original_filename, file_path)
+            
+            self.validate_file_security(file_path)
+            
+            return {
+                'original_filename': original_filename,
+                'saved_filename': unique_name,
+                'file_path': file_path,
+                'file_size': target.size,
+                'file_size_formatted': format_file_size(target.size),
+                'file_hash': target.digest.hexdigest(),
+                'content_type': target.multipart_content_type
+            }
+            
+        except Exception as e:
+            # Remove o que tiver sido gravado antes da falha
+            if target is not None:
+                target.close()
+            for path in (staging_path, file_path):
+                if path:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            if isinstance(e, (ValidationError, SecurityError)):
+                raise
+            logger.error("Erro inesperado ao salvar upload em streaming: %s", e)
             raise FileProcessingError(f"Erro ao salvar arquivo: {e}")
     
+    def save_raw_upload(self, stream: BinaryIO, filename: Optional[str] = None,
+                        content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Salva um PDF enviado diretamente no corpo da requisição.
+        
+        Sem multipart não há nada a decodificar: o corpo é copiado para o
+        disco em blocos de 1 MiB, com hash e tamanho calculados na cópia.
+        
+        Args:
+            stream: Corpo da requisição (request.stream)
+            filename: Nome original informado pelo cliente, se houver
+            content_type: Content-Type da requisição
+            
+        Returns:
+            Dicionário com informações do arquivo salvo, como em save_uploaded_file
+            
+        Raises:
+            ValidationError: Se a validação falhar
+            SecurityError: Se detectada ameaça de segurança
+        """
+        original_filename = filename or 'upload.pdf'
+        file_path = None
+        try:
+            file_ext = self._validate_extension(original_filename)
+            unique_name = f"{uuid.uuid4().hex}{file_ext}"
+            file_path = os.path.join(self.upload_folder, unique_name)
+            
+            file_hash, file_size = self._copy_stream(stream, file_path)
+            logger.info("Arquivo salvo do corpo da requisição: %r -> %s", original_filename, file_path)
+            
+            self.validate_file_security(file_path)
+            
+            return {
+                'original_filename': original_filename,
+                'saved_filename': unique_name,
+                'file_path': file_path,
+                'file_size': file_size,
+                'file_size_formatted': format_file_size(file_size),
+                'file_hash': file_hash,
+                'content_type': content_type
+            }
+            
+        except Exception as e:
+            if file_path:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            if isinstance(e, (ValidationError, SecurityError)):
+                raise
+            logger.error("Erro inesperado ao salvar corpo da requisição: %s", e)
+            raise FileProcessingError(f"Erro ao salvar arquivo: {e}")
+    
+    def _write_upload(self, file: FileStorage, file_path: str) -> Tuple[str, int]:
+        """Grava um upload multipart em disco (ver _copy_stream)."""
+        file.stream.seek(0)
+        return self._copy_stream(file.stream, file_path)
+    
+    def _copy_stream(self, src: BinaryIO, file_path: str) -> Tuple[str, int]:
+        """
+        Grava o conteúdo de um stream em disco em blocos de 1 MiB.
+        
+        O SHA-256 é calculado no mesmo laço da cópia, evitando uma segunda
+        leitura do arquivo salvo só para gerar o hash.
+        
+        Returns:
+            Tupla com o hash SHA-256 (hexadecimal) e o tamanho em bytes do
+            conteúdo gravado
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(file_path, 'wb') as dst:
+            if not hasattr(src, 'readinto'):
+                for chunk in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+                return digest.hexdigest(), size
+            
+            # Lê direto em um buffer do pool: sem um novo bytes por bloco
+            with bufpool.borrow() as buffer:
+                view = memoryview(buffer)
+                while True:
+                    read = src.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+                    dst.write(view[:read])
+                    size += read
+        
+        return digest.hexdigest(), size
+    
+    def _confine_client_path(self, file_path: str) -> str:
+        """
+        Resolve um caminho informado pelo cliente e exige que esteja na pasta de upload.
+        
+        A verificação é feita antes de qualquer stat/open do arquivo, de modo
+        que a resposta não revela se caminhos fora da pasta existem.
+        
+        Args:
+            file_path: Caminho recebido na requisição
+            
+        Returns:
+            Caminho absoluto resolvido (symlinks incluídos)
+            
+        Raises:
+            SecurityError: Se o caminho estiver fora da pasta de upload
+        """
+        root = str(Path(self.upload_folder).resolve())
+        resolved = str(Path(file_path).resolve())
+        if os.path.commonpath([resolved, root]) != root:
+            raise SecurityError("Acesso negado: o arquivo deve estar na pasta de upload")
+        return resolved
+    
     def validate_existing_file(self, file_path: str) -> Dict[str, Any]:
         """
-        Valida um arquivo já existente no sistema.
+        Valida um arquivo já existente no sistema, informado pelo cliente.
+        
+        Apenas arquivos dentro da pasta de upload são aceitos.
         
         Args:
             file_path: Caminho do arquivo
@@ -164,24 +450,27 @@ class FileService:
             
         Raises:
             ValidationError: Se a validação falhar
+            SecurityError: Se o caminho estiver fora da pasta de upload
         """
         try:
-            # Normaliza o caminho
-            normalized_path = os.path.normpath(file_path)
+            # Resolve e restringe o caminho antes de tocar no arquivo
+            normalized_path = self._confine_client_path(file_path)
             
-            # Verifica se o arquivo existe
-            if not os.path.exists(normalized_path):
+            # Um único stat(2) cobre existência, tipo e tamanho
+            try:
+                file_stat = os.stat(normalized_path)
+            except FileNotFoundError:
                 raise ValidationError(f"Arquivo não encontrado: {normalized_path}")
             
             # Verifica se é um arquivo (não diretório)
-            if not os.path.isfile(normalized_path):
+            if not stat.S_ISREG(file_stat.st_mode):
                 raise ValidationError(f"Caminho não é um arquivo: {normalized_path}")
             
             # Valida segurança
             self.validate_file_security(normalized_path)
             
             # Coleta informações do arquivo
-            file_size = os.path.getsize(normalized_path)
+            file_size = file_stat.st_size
             file_hash = calculate_file_hash(normalized_path)
             filename = os.path.basename(normalized_path)
             
@@ -196,7 +485,7 @@ class FileService:
         except (ValidationError, SecurityError):
             raise
         except Exception as e:
-            logger.error(f"Erro ao validar arquivo existente: {e}")
+            logger.error("Erro ao validar arquivo existente: %s", e)
             raise ValidationError(f"Erro na validação: {e}")
     
     def cleanup_file(self, file_path: str) -> bool:
@@ -210,15 +499,14 @@ class FileService:
             True se removido com sucesso, False caso contrário
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Arquivo removido: {file_path}")
-                return True
-            else:
-                logger.warning(f"Tentativa de remover arquivo inexistente: {file_path}")
-                return False
+            os.remove(file_path)
+            logger.info("Arquivo removido: %s", file_path)
+            return True
+        except FileNotFoundError:
+            logger.warning("Tentativa de remover arquivo inexistente: %s", file_path)
+            return False
         except Exception as e:
-            logger.error(f"Erro ao remover arquivo {file_path}: {e}")
+            logger.error("Erro ao remover arquivo %s: %s", file_path, e)
             return False
     
     def cleanup_old_files(self, max_age_hours: int = 24) -> int:
@@ -246,13 +534,45 @@ class FileService:
                         if self.cleanup_file(file_path):
                             removed_count += 1
             
-            logger.info(f"Limpeza concluída: {removed_count} arquivos removidos")
+            logger.info("Limpeza concluída: %s arquivos removidos", removed_count)
             return removed_count
             
         except Exception as e:
-            logger.error(f"Erro durante limpeza de arquivos antigos: {e}")
+            logger.error("Erro durante limpeza de arquivos antigos: %s", e)
             return removed_count
     
+    def cleanup_old_table_outputs(self, max_age_hours: int = 24,
+                                  base_dir: Optional[str] = None) -> int:
+        """
+        Remove diretórios antigos de tabelas salvas (save_files=true).
+        
+        Args:
+            max_age_hours: Idade máxima dos diretórios em horas
+            base_dir: Diretório das tabelas (padrão: settings.tables_output_folder)
+            
+        Returns:
+            Número de diretórios removidos
+        """
+        base_dir = base_dir or settings.tables_output_folder
+        removed_count = 0
+        cutoff = __import__('time').time() - max_age_hours * 3600
+        
+        try:
+            with os.scandir(base_dir) as entries:
+                for entry in entries:
+                    # scandir já traz o tipo; só um stat por diretório
+                    if entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        removed_count += 1
+        except FileNotFoundError:
+            # Nenhuma tabela foi salva ainda
+            return 0
+        except Exception as e:
+            logger.error("Erro durante limpeza de tabelas antigas: %s", e)
+        
+        logger.info("Limpeza de tabelas concluída: %s diretórios removidos", removed_count)
+        return removed_count
+    
     def get_upload_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas do diretório de upload.
@@ -281,7 +601,7 @@ class FileService:
             }
             
         except Exception as e:
-            logger.error(f"Erro ao obter estatísticas de upload: {e}")
+            logger.error("Erro ao obter estatísticas de upload: %s", e)
             return {'error': str(e)}
 
 
@@ -0,0 +1,125 @@
+"""
+Serviço de jobs em segundo plano para o PDF Digest.
+"""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.config.settings import settings
+from src.services.cache_service import cache_service
+from src.services.file_service import file_service
+from src.utils.exceptions import PDFDigestException
+
+logger = logging.getLogger(__name__)
+
+
+class JobService:
+    """
+    Executa conversões fora da thread da requisição.
+    
+    Os jobs rodam em um pool de threads do processo; o estado de cada job
+    (queued, running, finished, failed) fica no Redis com TTL, de modo que
+    qualquer worker consegue responder à consulta. Sem Redis, o estado fica
+    em memória no próprio processo.
+    """
+    
+    KEY_PREFIX = "pdf_job:"
+    
+    def __init__(self):
+        """Inicializa o pool de execução dos jobs."""
+        self.ttl = settings.job_result_ttl
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.job_workers,
+            thread_name_prefix='pdf-job'
+        )
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, func: Callable[..., Dict[str, Any]], *args,
+               cleanup_path: Optional[str] = None) -> str:
+        """
+        Enfileira uma função para execução em segundo plano.
+        
+        Args:
+            func: Função que produz os dados da resposta
+            *args: Argumentos da função
+            cleanup_path: Arquivo a remover quando o job terminar
+            
+        Returns:
+            Identificador do job
+        """
+        job_id = uuid.uuid4().hex
+        self._store(job_id, {'job_id': job_id, 'status': 'queued', 'created_at': time.time()})
+        self.executor.submit(self._run, job_id, func, args, cleanup_path)
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o estado de um job.
+        
+        Args:
+            job_id: Identificador do job
+            
+        Returns:
+            Estado do job ou None se desconhecido/expirado
+        """
+        # A memória tem precedência: guarda o estado quando a gravação no Redis falhou
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or not cache_service.enabled:
+            return job
+        
+        return cache_service.get(self.KEY_PREFIX + job_id)
+    
+    def _run(self, job_id: str, func: Callable[..., Dict[str, Any]], args: tuple,
+             cleanup_path: Optional[str]):
+        """Executa o job e registra o resultado ou o erro."""
+        job = {'job_id': job_id, 'status': 'running', 'started_at': time.time()}
+        self._store(job_id, job)
+        
+        try:
+            job.update(status='finished', result=func(*args))
+        except PDFDigestException as e:
+            logger.warning("Job %s falhou: %s", job_id, e)
+            job.update(status='failed', error={'message': e.message, 'code': e.code or type(e).__name__})
+        except Exception as e:
+            logger.exception("Erro inesperado no job %s: %s", job_id, e)
+            job.update(status='failed', error={'message': str(e), 'code': 'UNEXPECTED_ERROR'})
+        finally:
+            if cleanup_path:
+                file_service.cleanup_file(cleanup_path)
+        
+        job['finished_at'] = time.time()
+        self._store(job_id, job)
+    
+    def _store(self, job_id: str, job: Dict[str, Any]):
+        """
+        Grava o estado do job no Redis (com TTL) ou em memória.
+        
+        Se o Redis recusar a gravação, o estado fica em memória (visível
+        apenas neste processo) em vez de o job parecer em andamento até o TTL.
+        """
+        if cache_service.enabled:
+            if cache_service.set(self.KEY_PREFIX + job_id, job, ttl=self.ttl):
+                with self._lock:
+                    self._jobs.pop(job_id, None)
+                return
+            logger.warning("Falha ao gravar o job %s no Redis; estado mantido em memória", job_id)
+        
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = job
+            # Descarta jobs concluídos há mais que o TTL
+            expired = [
+                key for key, value in self._jobs.items()
+                if now - value.get('finished_at', now) > self.ttl
+            ]
+            for key in expired:
+                del self._jobs[key]
+
+
+# Instância global do serviço de jobs
+job_service = JobService()
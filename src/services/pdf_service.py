@@ -1,18 +1,21 @@
 """
 Serviço para validação e conversão de arquivos PDF para Markdown.
 """
+import hashlib
 import os
+import stat
 import logging
 import torch
 import re
 import json
 import csv
 import pandas as pd
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Optional, Any, Union
 
 from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import DocumentStream, InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling.datamodel.document import DoclingDocument
 
@@ -23,12 +26,27 @@ from src.utils.helpers import calculate_file_hash
 
 logger = logging.getLogger(__name__)
 
+# Versão do formato das tabelas em cache; incrementar invalida entradas antigas
+TABLES_CACHE_VERSION = "v1"
+
+# Expressões compiladas uma única vez no carregamento do módulo
+_NOTA_NEGOCIACAO_RE = re.compile(r'NOTA DE NEGOCIAÇÃO', re.IGNORECASE)
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+
 
 class PDFService:
     """
     Serviço para validar e converter PDFs para Markdown com extração avançada de tabelas.
     """
 
+    # Conversor de cada formato de export; None mantém os dados como lista (JSON)
+    _TABLE_EXPORTERS = {
+        'json': None,
+        'csv': '_convert_table_to_csv',
+        'excel': '_convert_table_to_excel_format',
+        'html': '_convert_table_to_html'
+    }
+
     def __init__(self):
         """
         Inicializa o conversor de documentos docling com configurações otimizadas para tabelas.
@@ -43,7 +61,7 @@ class PDFService:
             self.device = torch.device('cpu')
             logger.info("Usando CPU para processamento")
         
-        logger.info(f"Dispositivo configurado: {self.device}")
+        logger.info("Dispositivo configurado: %s", self.device)
         
         # Configurações avançadas para melhor extração de tabelas
         self._setup_advanced_converter()
@@ -76,10 +94,10 @@ class PDFService:
             # Move o modelo para o dispositivo apropriado se possível
             if hasattr(self.converter, 'model') and hasattr(self.converter.model, 'to'):
                 self.converter.model.to(self.device)
-                logger.info(f"Modelo movido para {self.device}")
+                logger.info("Modelo movido para %s", self.device)
                 
         except Exception as e:
-            logger.error(f"Erro ao inicializar DocumentConverter: {e}")
+            logger.error("Erro ao inicializar DocumentConverter: %s", e)
             raise ConversionError(f"Falha na inicialização do conversor: {e}")
 
     def validate_pdf(self, file_path: str) -> bool:
@@ -95,11 +113,15 @@ class PDFService:
         Raises:
             ValidationError: Se a validação falhar
         """
-        logger.debug(f"Validando arquivo PDF: {file_path}")
+        logger.debug("Validando arquivo PDF: %s", file_path)
         
         try:
-            # Verifica se o arquivo existe
-            if not os.path.isfile(file_path):
+            # Verifica se o arquivo existe (um único stat(2) também fornece o tamanho)
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                file_stat = None
+            if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
                 raise ValidationError(f"O arquivo não existe: {file_path}")
             
             # Verifica se o arquivo tem extensão .pdf
@@ -107,7 +129,7 @@ class PDFService:
                 raise ValidationError(f"O arquivo não tem extensão .pdf: {file_path}")
             
             # Verifica tamanho do arquivo
-            file_size = os.path.getsize(file_path)
+            file_size = file_stat.st_size
             if file_size == 0:
                 raise ValidationError("O arquivo está vazio")
             
@@ -126,14 +148,14 @@ class PDFService:
                         f"Cabeçalho encontrado: {header}"
                     )
             
-            logger.debug(f"Arquivo validado com sucesso: {file_path}")
+            logger.debug("Arquivo validado com sucesso: %s", file_path)
             return True
             
         except ValidationError:
-            logger.error(f"Validação falhou para: {file_path}")
+            logger.error("Validação falhou para: %s", file_path)
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado durante validação: {e}")
+            logger.error("Erro inesperado durante validação: %s", e)
             raise ValidationError(f"Erro durante validação: {e}")
 
     def _split_by_nota_negociacao(self, markdown: str) -> List[Tuple[int, str]]:
@@ -149,7 +171,7 @@ class PDFService:
         logger.debug("Dividindo markdown por 'NOTA DE NEGOCIAÇÃO'")
         
         # Encontra todas as ocorrências de "NOTA DE NEGOCIAÇÃO"
-        matches = list(re.finditer(r'NOTA DE NEGOCIAÇÃO', markdown, re.IGNORECASE))
+        matches = list(_NOTA_NEGOCIACAO_RE.finditer(markdown))
         
         if not matches:
             logger.warning("Nenhuma ocorrência de 'NOTA DE NEGOCIAÇÃO' encontrada")
@@ -169,16 +191,27 @@ class PDFService:
             
             pages.append((i + 1, content.strip()))
         
-        logger.debug(f"Markdown dividido em {len(pages)} seções")
+        logger.debug("Markdown dividido em %s seções", len(pages))
         return pages
 
-    def convert_pdf_to_markdown(self, file_path: str, use_cache: bool = True) -> Dict[str, str]:
+    def convert_pdf_to_markdown(self, file_path: str, use_cache: bool = True,
+                                file_hash: Optional[str] = None,
+                                validate: bool = True,
+                                cache_checked: bool = False) -> Dict[str, str]:
         """
         Converte um arquivo PDF para Markdown, separando por ocorrências de "NOTA DE NEGOCIAÇÃO".
 
         Args:
             file_path (str): Caminho do arquivo PDF a ser convertido.
             use_cache (bool): Se deve usar cache para resultados
+            file_hash (str, optional): SHA-256 já calculado do arquivo; quando
+                informado, o cache é consultado antes da validação e o arquivo
+                não é lido novamente para gerar a chave
+            validate (bool): Se deve validar o arquivo; use False quando o
+                chamador já validou (ex.: uploads validados pelo FileService)
+            cache_checked (bool): True quando o chamador já consultou o cache
+                para file_hash (ex.: get_cached_markdown) e não houve acerto;
+                a consulta não é repetida, mas o resultado é armazenado
 
         Returns:
             dict: Dicionário com o conteúdo de cada nota em formato Markdown.
@@ -188,64 +221,168 @@ class PDFService:
             ValidationError: Se o arquivo não for válido
             ConversionError: Se ocorrer erro durante a conversão
         """
-        logger.info(f"Iniciando conversão do PDF para Markdown: {file_path}")
+        logger.info("Iniciando conversão do PDF para Markdown: %s", file_path)
         
         try:
+            # Conteúdo já conhecido: um acerto no cache dispensa validação e conversão
+            cache_key = None
+            if use_cache and cache_service.enabled and file_hash:
+                cache_key = f"pdf_conversion:{file_hash}"
+                cached_result = None if cache_checked else self._get_cached(cache_key, file_path)
+                if cached_result:
+                    return cached_result
+            
             # Valida o arquivo
-            self.validate_pdf(file_path)
+            if validate:
+                self.validate_pdf(file_path)
             
             # Verifica cache se habilitado
-            cache_key = None
-            if use_cache and cache_service.enabled:
+            if use_cache and cache_service.enabled and cache_key is None:
                 try:
                     file_hash = calculate_file_hash(file_path)
                     cache_key = f"pdf_conversion:{file_hash}"
-                    
-                    cached_result = cache_service.get(cache_key)
+                except Exception as e:
+                    logger.warning("Erro ao acessar cache: %s", e)
+                else:
+                    cached_result = self._get_cached(cache_key, file_path)
                     if cached_result:
-                        logger.info(f"Resultado encontrado no cache: {file_path}")
                         return cached_result
-                except Exception as e:
-                    logger.warning(f"Erro ao acessar cache: {e}")
             
-            # Executa a conversão
-            logger.info(f"Executando conversão com docling: {file_path}")
-            result = self.converter.convert(file_path)
+            return self._convert_to_pages(file_path, file_path, cache_key)
             
-            # Verifica se o resultado da conversão é válido
-            if not result or not hasattr(result, 'document'):
-                raise ConversionError("Resultado da conversão inválido ou vazio")
-            
-            # Converte o documento inteiro para markdown
-            markdown = result.document.export_to_markdown()
-            
-            if not markdown or not markdown.strip():
-                raise ConversionError("Conteúdo markdown vazio após conversão")
-            
-            # Divide o markdown em páginas baseado no marcador
-            pages = self._split_by_nota_negociacao(markdown)
-            logger.info(f"Documento dividido em {len(pages)} notas de negociação")
-            
-            # Converte a lista de tuplas em um dicionário
-            pages_markdown = {str(page_num): content for page_num, content in pages}
-            
-            # Armazena no cache se habilitado
-            if use_cache and cache_service.enabled and cache_key:
-                try:
-                    cache_service.set(cache_key, pages_markdown)
-                    logger.debug(f"Resultado armazenado no cache: {cache_key}")
-                except Exception as e:
-                    logger.warning(f"Erro ao armazenar no cache: {e}")
+        except (ValidationError, ConversionError):
+            raise
+        except Exception as e:
+            logger.error("Erro inesperado durante a conversão: %s", e)
+            raise ConversionError(f"Erro inesperado ao converter PDF: {e}")
+    
+    def convert_bytes_to_markdown(self, data: bytes, filename: str = 'document.pdf',
+                                  use_cache: bool = True,
+                                  file_hash: Optional[str] = None,
+                                  cache_checked: bool = False) -> Dict[str, str]:
+        """
+        Converte um PDF já carregado em memória para Markdown.
+        
+        Equivalente a convert_pdf_to_markdown para uploads: o conteúdo é
+        entregue ao docling como stream, sem gravar e reler um arquivo
+        temporário. A validação fica a cargo do chamador.
+
+        Args:
+            data (bytes): Conteúdo do PDF
+            filename (str): Nome usado pelo docling e nos logs
+            use_cache (bool): Se deve usar cache para resultados
+            file_hash (str, optional): SHA-256 já calculado do conteúdo
+            cache_checked (bool): Cache já consultado pelo chamador (ver
+                convert_pdf_to_markdown)
+
+        Returns:
+            dict: Dicionário com o conteúdo de cada nota em formato Markdown.
+
+        Raises:
+            ConversionError: Se ocorrer erro durante a conversão
+        """
+        logger.info("Iniciando conversão do PDF em memória para Markdown: %s", filename)
+        
+        try:
+            cache_key = None
+            if use_cache and cache_service.enabled:
+                if file_hash is None:
+                    file_hash = hashlib.sha256(data).hexdigest()
+                cache_key = f"pdf_conversion:{file_hash}"
+                cached_result = None if cache_checked else self._get_cached(cache_key, filename)
+                if cached_result:
+                    return cached_result
             
-            logger.info(f"Conversão concluída com sucesso para: {file_path}")
-            return pages_markdown
+            source = DocumentStream(name=filename, stream=BytesIO(data))
+            return self._convert_to_pages(source, filename, cache_key)
             
-        except (ValidationError, ConversionError):
+        except ConversionError:
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado durante a conversão: {e}")
+            logger.error("Erro inesperado durante a conversão: %s", e)
             raise ConversionError(f"Erro inesperado ao converter PDF: {e}")
     
+    def _convert_to_pages(self, source: Union[str, DocumentStream], label: str,
+                          cache_key: Optional[str]) -> Dict[str, str]:
+        """Executa o docling sobre a fonte e divide o markdown por nota de negociação."""
+        document = self._run_docling(source, label)
+        pages_markdown = self._pages_from_document(document, cache_key)
+        logger.info("Conversão concluída com sucesso para: %s", label)
+        return pages_markdown
+    
+    def _run_docling(self, source: Union[str, DocumentStream], label: str) -> DoclingDocument:
+        """Executa o docling sobre a fonte e retorna o documento processado."""
+        logger.info("Executando conversão com docling: %s", label)
+        result = self.converter.convert(source)
+        
+        # Verifica se o resultado da conversão é válido
+        if not result or not hasattr(result, 'document'):
+            raise ConversionError("Resultado da conversão inválido ou vazio")
+        
+        return result.document
+    
+    def _pages_from_document(self, document: DoclingDocument,
+                             cache_key: Optional[str]) -> Dict[str, str]:
+        """Exporta o documento para markdown e o divide por nota de negociação."""
+        # Converte o documento inteiro para markdown
+        markdown = document.export_to_markdown()
+        
+        if not markdown or not markdown.strip():
+            raise ConversionError("Conteúdo markdown vazio após conversão")
+        
+        # Divide o markdown em páginas baseado no marcador
+        pages = self._split_by_nota_negociacao(markdown)
+        logger.info("Documento dividido em %s notas de negociação", len(pages))
+        
+        # Converte a lista de tuplas em um dicionário
+        pages_markdown = {str(page_num): content for page_num, content in pages}
+        
+        # Armazena no cache se habilitado
+        if cache_key and cache_service.enabled:
+            try:
+                cache_service.set(cache_key, pages_markdown)
+                logger.debug("Resultado armazenado no cache: %s", cache_key)
+            except Exception as e:
+                logger.warning("Erro ao armazenar no cache: %s", e)
+        
+        return pages_markdown
+    
+    def _get_cached(self, cache_key: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """Consulta o cache sem deixar falhas do cache interromperem a conversão."""
+        try:
+            cached_result = cache_service.get(cache_key)
+        except Exception as e:
+            logger.warning("Erro ao acessar cache: %s", e)
+            return None
+        
+        if cached_result:
+            logger.info("Resultado encontrado no cache: %s", file_path)
+        return cached_result
+
+    def get_cached_markdown(self, file_hash: str) -> Optional[Dict[str, str]]:
+        """
+        Retorna a conversão em cache para o conteúdo com o hash informado.
+
+        Returns:
+            Páginas em markdown (como em convert_pdf_to_markdown) ou None
+        """
+        if not cache_service.enabled:
+            return None
+        return self._get_cached(f"pdf_conversion:{file_hash}", file_hash)
+
+    def get_cached_tables(self, file_hash: str, export_format: str = "json") -> Optional[Dict[str, Any]]:
+        """
+        Retorna a extração de tabelas em cache para o conteúdo e formato informados.
+
+        Returns:
+            Resultado como em extract_tables_advanced ou None
+        """
+        if not cache_service.enabled:
+            return None
+        return self._get_cached(
+            f"pdf_tables:{TABLES_CACHE_VERSION}:{file_hash}:{export_format}", file_hash
+        )
+
     def get_device_info(self) -> Dict[str, any]:
         """
         Retorna informações sobre o dispositivo de processamento.
@@ -278,65 +415,253 @@ class PDFService:
         try:
             if cache_service.enabled:
                 # Remove apenas chaves relacionadas a conversões PDF
-                # Implementação simplificada - em produção seria mais específica
                 return cache_service.clear_all()
             return True
         except Exception as e:
-            logger.error(f"Erro ao limpar cache: {e}")
+            logger.error("Erro ao limpar cache: %s", e)
             return False
 
-    def extract_tables_advanced(self, file_path: str, export_format: str = "json") -> Dict[str, Any]:
+    def extract_tables_advanced(self, file_path: str, export_format: str = "json",
+                                use_cache: bool = True,
+                                file_hash: Optional[str] = None,
+                                validate: bool = True,
+                                cache_checked: bool = False) -> Dict[str, Any]:
         """
         Extrai tabelas de forma avançada usando as capacidades completas do Docling.
 
         Args:
             file_path (str): Caminho do arquivo PDF.
             export_format (str): Formato de export ('json', 'csv', 'excel', 'html').
+            use_cache (bool): Se deve usar cache para resultados
+            file_hash (str, optional): SHA-256 já calculado do arquivo (ver
+                convert_pdf_to_markdown)
+            validate (bool): Se deve validar o arquivo (ver convert_pdf_to_markdown)
+            cache_checked (bool): Cache já consultado pelo chamador (ver
+                convert_pdf_to_markdown)
 
         Returns:
             Dict com tabelas extraídas e metadados.
         """
-        logger.info(f"Iniciando extração avançada de tabelas: {file_path}")
+        logger.info("Iniciando extração avançada de tabelas: %s", file_path)
         
         try:
+            # Conteúdo já conhecido: um acerto no cache dispensa validação e extração
+            cache_key = None
+            if use_cache and cache_service.enabled and file_hash:
+                cache_key = f"pdf_tables:{TABLES_CACHE_VERSION}:{file_hash}:{export_format}"
+                cached_result = None if cache_checked else self._get_cached(cache_key, file_path)
+                if cached_result:
+                    return cached_result
+            
             # Valida o arquivo
-            self.validate_pdf(file_path)
+            if validate:
+                self.validate_pdf(file_path)
+            
+            # Verifica cache se habilitado (o resultado depende apenas do conteúdo do PDF)
+            if use_cache and cache_service.enabled and cache_key is None:
+                try:
+                    file_hash = calculate_file_hash(file_path)
+                    cache_key = f"pdf_tables:{TABLES_CACHE_VERSION}:{file_hash}:{export_format}"
+                except Exception as e:
+                    logger.warning("Erro ao acessar cache: %s", e)
+                else:
+                    cached_result = self._get_cached(cache_key, file_path)
+                    if cached_result:
+                        return cached_result
             
             # Executa a conversão com foco em tabelas
-            result = self.converter.convert(file_path)
+            document = self._run_docling(file_path, file_path)
+            return self._tables_from_document(document, export_format, cache_key)
             
-            if not result or not hasattr(result, 'document'):
-                raise ConversionError("Resultado da conversão inválido")
+        except (ValidationError, ConversionError):
+            raise
+        except Exception as e:
+            logger.error("Erro durante extração de tabelas: %s", e)
+            raise ConversionError(f"Erro ao extrair tabelas: {e}")
+    
+    def _tables_from_document(self, document: DoclingDocument, export_format: str,
+                              cache_key: Optional[str]) -> Dict[str, Any]:
+        """Extrai e exporta as tabelas de um documento já processado pelo docling."""
+        # Extrai tabelas com metadados completos
+        tables_data = self._extract_tables_from_document(document)
+        
+        # Processa e exporta conforme formato solicitado
+        processed_tables = self._process_tables_for_export(tables_data, export_format)
+        
+        # Prepara resposta estruturada
+        response = {
+            'tables': processed_tables,
+            'metadata': self._tables_metadata(len(tables_data), export_format)
+        }
+        
+        # Armazena no cache se habilitado
+        if cache_key:
+            try:
+                cache_service.set(cache_key, response)
+                logger.debug("Tabelas armazenadas no cache: %s", cache_key)
+            except Exception as e:
+                logger.warning("Erro ao armazenar no cache: %s", e)
+        
+        logger.info("Extração de tabelas concluída: %s tabelas encontradas", len(tables_data))
+        return response
+    
+    def _tables_metadata(self, total_tables: int, export_format: str) -> Dict[str, Any]:
+        """Monta os metadados de uma extração de tabelas."""
+        return {
+            'total_tables': total_tables,
+            'export_format': export_format,
+            'processing_info': {
+                'device': str(self.device),
+                'pipeline_used': 'advanced_table_extraction'
+            }
+        }
+    
+    def iter_tables_advanced(self, file_path: str, export_format: str = "json",
+                             use_cache: bool = True,
+                             file_hash: Optional[str] = None,
+                             validate: bool = True) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Variante de extract_tables_advanced que exporta as tabelas sob demanda.
+        
+        Validação, cache e docling são executados antes do retorno, de modo
+        que os erros são levantados aqui; cada tabela só é convertida para o
+        formato de export quando o iterador é consumido. O resultado completo
+        é armazenado no cache quando o iterador termina.
+        
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+            export_format (str): Formato de export ('json', 'csv', 'excel', 'html').
+            use_cache (bool): Se deve usar cache para resultados
+            file_hash (str, optional): SHA-256 já calculado do arquivo
+            validate (bool): Se deve validar o arquivo
+            
+        Returns:
+            Tupla (metadados da extração, iterador das tabelas processadas)
+            
+        Raises:
+            ValidationError: Se o arquivo não for válido
+            ConversionError: Se ocorrer erro durante a extração
+        """
+        logger.info("Iniciando extração de tabelas sob demanda: %s", file_path)
+        
+        try:
+            if validate:
+                self.validate_pdf(file_path)
             
-            document: DoclingDocument = result.document
+            cache_key = None
+            if use_cache and cache_service.enabled:
+                if file_hash is None:
+                    file_hash = calculate_file_hash(file_path)
+                cache_key = f"pdf_tables:{TABLES_CACHE_VERSION}:{file_hash}:{export_format}"
+                cached_result = self._get_cached(cache_key, file_path)
+                if cached_result:
+                    return cached_result['metadata'], iter(cached_result['tables'])
             
-            # Extrai tabelas com metadados completos
+            document = self._run_docling(file_path, file_path)
             tables_data = self._extract_tables_from_document(document)
             
-            # Processa e exporta conforme formato solicitado
-            processed_tables = self._process_tables_for_export(tables_data, export_format)
+        except (ValidationError, ConversionError):
+            raise
+        except Exception as e:
+            logger.error("Erro durante extração de tabelas: %s", e)
+            raise ConversionError(f"Erro ao extrair tabelas: {e}")
+        
+        metadata = self._tables_metadata(len(tables_data), export_format)
+        return metadata, self._export_tables(tables_data, export_format, metadata, cache_key)
+    
+    def _export_tables(self, tables_data: List[Dict[str, Any]], export_format: str,
+                       metadata: Dict[str, Any], cache_key: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Exporta as tabelas uma a uma e armazena o resultado no cache ao final."""
+        processed_tables = []
+        for processed_table in self._iter_tables_for_export(tables_data, export_format):
+            processed_tables.append(processed_table)
+            yield processed_table
+        
+        if cache_key:
+            try:
+                cache_service.set(cache_key, {'tables': processed_tables, 'metadata': metadata})
+                logger.debug("Tabelas armazenadas no cache: %s", cache_key)
+            except Exception as e:
+                logger.warning("Erro ao armazenar no cache: %s", e)
+    
+    def convert_and_extract_tables(self, file_path: str, table_format: str = "json",
+                                   use_cache: bool = True,
+                                   file_hash: Optional[str] = None,
+                                   validate: bool = True,
+                                   cache_checked: bool = False) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Converte o PDF para Markdown e extrai as tabelas com uma única execução do docling.
+        
+        Equivale a convert_pdf_to_markdown seguido de extract_tables_advanced,
+        mas o documento processado é compartilhado pelas duas saídas. Cada
+        saída continua em cache com a mesma chave dos métodos separados.
+        
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+            table_format (str): Formato de export das tabelas.
+            use_cache (bool): Se deve usar cache para resultados
+            file_hash (str, optional): SHA-256 já calculado do arquivo
+            validate (bool): Se deve validar o arquivo
+            cache_checked (bool): Cache já consultado pelo chamador (ver
+                convert_pdf_to_markdown); as duas saídas são geradas e armazenadas
+            
+        Returns:
+            Tupla (páginas em markdown, resultado da extração de tabelas). Uma
+            falha apenas na extração de tabelas é reportada nos metadados.
             
-            # Prepara resposta estruturada
-            response = {
-                'tables': processed_tables,
-                'metadata': {
-                    'total_tables': len(tables_data),
-                    'export_format': export_format,
-                    'processing_info': {
-                        'device': str(self.device),
-                        'pipeline_used': 'advanced_table_extraction'
+        Raises:
+            ValidationError: Se o arquivo não for válido
+            ConversionError: Se ocorrer erro durante a conversão
+        """
+        logger.info("Iniciando conversão com extração de tabelas: %s", file_path)
+        
+        try:
+            use_cache = use_cache and cache_service.enabled
+            
+            # Sem hash conhecido (ou sem consulta a fazer), valida antes de ler o arquivo
+            if validate and not (use_cache and file_hash and not cache_checked):
+                self.validate_pdf(file_path)
+                validate = False
+            
+            pages_key = tables_key = None
+            pages_markdown = tables_result = None
+            if use_cache:
+                if file_hash is None:
+                    file_hash = calculate_file_hash(file_path)
+                pages_key = f"pdf_conversion:{file_hash}"
+                tables_key = f"pdf_tables:{TABLES_CACHE_VERSION}:{file_hash}:{table_format}"
+                if not cache_checked:
+                    pages_markdown = self._get_cached(pages_key, file_path)
+                    tables_result = self._get_cached(tables_key, file_path)
+                    if pages_markdown and tables_result:
+                        return pages_markdown, tables_result
+            
+            if validate:
+                self.validate_pdf(file_path)
+            
+            document = self._run_docling(file_path, file_path)
+            
+            if not pages_markdown:
+                pages_markdown = self._pages_from_document(document, pages_key)
+            
+            if not tables_result:
+                try:
+                    tables_result = self._tables_from_document(document, table_format, tables_key)
+                except Exception as e:
+                    logger.warning("Erro na extração de tabelas: %s", e)
+                    tables_result = {
+                        'tables': [],
+                        'metadata': {'error': str(e), 'total_tables': 0}
                     }
-                }
-            }
             
-            logger.info(f"Extração de tabelas concluída: {len(tables_data)} tabelas encontradas")
-            return response
+            logger.info("Conversão com extração de tabelas concluída para: %s", file_path)
+            return pages_markdown, tables_result
             
         except (ValidationError, ConversionError):
             raise
         except Exception as e:
-            logger.error(f"Erro durante extração de tabelas: {e}")
-            raise ConversionError(f"Erro ao extrair tabelas: {e}")
+            logger.error("Erro inesperado durante a conversão: %s", e)
+            raise ConversionError(f"Erro inesperado ao converter PDF: {e}")
 
     def _extract_tables_from_document(self, document: DoclingDocument) -> List[Dict[str, Any]]:
         """
@@ -377,7 +702,7 @@ class PDFService:
                     table_info['data'] = self._parse_table_from_text(table_info['text_content'])
                 
                 tables_data.append(table_info)
-                logger.debug(f"Tabela extraída - ID: {table_info['id']}, Página: {table_info['page']}")
+                logger.debug("Tabela extraída - ID: %s, Página: %s", table_info['id'], table_info['page'])
         
         return tables_data
 
@@ -410,7 +735,7 @@ class PDFService:
             return []
             
         except Exception as e:
-            logger.warning(f"Erro ao analisar estrutura da tabela: {e}")
+            logger.warning("Erro ao analisar estrutura da tabela: %s", e)
             return []
 
     def _parse_table_from_text(self, text_content: str) -> List[List[str]]:
@@ -436,7 +761,7 @@ class PDFService:
                         cells = [cell.strip() for cell in line.split('|') if cell.strip()]
                     else:
                         # Usa espaçamento múltiplo como separador
-                        cells = re.split(r'\s{2,}', line.strip())
+                        cells = _MULTI_SPACE_RE.split(line.strip())
                     
                     if cells:
                         table_data.append([cell.strip() for cell in cells])
@@ -444,7 +769,7 @@ class PDFService:
             return table_data
             
         except Exception as e:
-            logger.warning(f"Erro ao extrair tabela do texto: {e}")
+            logger.warning("Erro ao extrair tabela do texto: %s", e)
             return []
 
     def _process_tables_for_export(self, tables_data: List[Dict[str, Any]], 
@@ -459,7 +784,15 @@ class PDFService:
         Returns:
             Lista de tabelas processadas.
         """
-        processed_tables = []
+        return list(self._iter_tables_for_export(tables_data, export_format))
+
+    def _iter_tables_for_export(self, tables_data: List[Dict[str, Any]],
+                                export_format: str) -> Iterator[Dict[str, Any]]:
+        """Gera as tabelas processadas para o formato de export, uma por vez."""
+        # Resolve o conversor uma única vez (formatos desconhecidos caem para JSON)
+        table_format = export_format if export_format in self._TABLE_EXPORTERS else 'json'
+        exporter_name = self._TABLE_EXPORTERS[table_format]
+        exporter = getattr(self, exporter_name) if exporter_name else None
         
         for table_info in tables_data:
             if not table_info['data']:
@@ -473,37 +806,12 @@ class PDFService:
                     'confidence': table_info['confidence'],
                     'rows': len(table_info['data']) if table_info['data'] else 0,
                     'cols': len(table_info['data'][0]) if table_info['data'] and table_info['data'][0] else 0
-                }
+                },
+                'data': exporter(table_info['data']) if exporter else table_info['data'],
+                'format': table_format
             }
             
-            # Processa conforme formato
-            if export_format == "json":
-                processed_table['data'] = table_info['data']
-                processed_table['format'] = 'json'
-                
-            elif export_format == "csv":
-                csv_content = self._convert_table_to_csv(table_info['data'])
-                processed_table['data'] = csv_content
-                processed_table['format'] = 'csv'
-                
-            elif export_format == "excel":
-                excel_data = self._convert_table_to_excel_format(table_info['data'])
-                processed_table['data'] = excel_data
-                processed_table['format'] = 'excel'
-                
-            elif export_format == "html":
-                html_content = self._convert_table_to_html(table_info['data'])
-                processed_table['data'] = html_content
-                processed_table['format'] = 'html'
-                
-            else:
-                # Formato padrão (JSON)
-                processed_table['data'] = table_info['data']
-                processed_table['format'] = 'json'
-            
-            processed_tables.append(processed_table)
-        
-        return processed_tables
+            yield processed_table
 
     def _convert_table_to_csv(self, table_data: List[List[str]]) -> str:
         """Converte tabela para formato CSV."""
@@ -514,7 +822,7 @@ class PDFService:
             writer.writerows(table_data)
             return output.getvalue()
         except Exception as e:
-            logger.error(f"Erro ao converter para CSV: {e}")
+            logger.error("Erro ao converter para CSV: %s", e)
             return ""
 
     def _convert_table_to_excel_format(self, table_data: List[List[str]]) -> Dict[str, Any]:
@@ -532,7 +840,7 @@ class PDFService:
                 'dataframe_compatible': True
             }
         except Exception as e:
-            logger.error(f"Erro ao converter para formato Excel: {e}")
+            logger.error("Erro ao converter para formato Excel: %s", e)
             return {'headers': [], 'rows': []}
 
     def _convert_table_to_html(self, table_data: List[List[str]]) -> str:
@@ -564,7 +872,7 @@ class PDFService:
             return "".join(html)
             
         except Exception as e:
-            logger.error(f"Erro ao converter para HTML: {e}")
+            logger.error("Erro ao converter para HTML: %s", e)
             return "<table></table>"
 
     def _escape_html(self, text: str) -> str:
@@ -590,7 +898,7 @@ class PDFService:
         """
         try:
             # Cria diretório se não existir
-            Path(output_dir).mkdir(exist_ok=True)
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
             
             saved_files = {
                 'csv': [],
@@ -619,7 +927,7 @@ class PDFService:
                         df.to_excel(filename, index=False)
                         saved_files['excel'].append(filename)
                     except Exception as e:
-                        logger.warning(f"Erro ao salvar Excel para tabela {table_id}: {e}")
+                        logger.warning("Erro ao salvar Excel para tabela %s: %s", table_id, e)
                         
                 elif table_format == 'html':
                     filename = f"{output_dir}/table_{table_id}.html"
@@ -633,11 +941,11 @@ class PDFService:
                         json.dump(table['data'], f, ensure_ascii=False, indent=2)
                     saved_files['json'].append(filename)
             
-            logger.info(f"Tabelas salvas em: {output_dir}")
+            logger.info("Tabelas salvas em: %s", output_dir)
             return saved_files
             
         except Exception as e:
-            logger.error(f"Erro ao salvar tabelas: {e}")
+            logger.error("Erro ao salvar tabelas: %s", e)
             return {'csv': [], 'excel': [], 'json': [], 'html': []}
 
 
@@ -0,0 +1,39 @@
+"""
+Pool de buffers reutilizáveis para cópia e hash de arquivos em blocos.
+"""
+import queue
+from contextlib import contextmanager
+from typing import Iterator
+
+# Tamanho de cada buffer (igual ao bloco de cópia dos uploads)
+BUFFER_SIZE = 1 << 20
+
+# Buffers ociosos mantidos no pool; os excedentes são descartados
+MAX_POOLED_BUFFERS = 64
+
+_pool: "queue.LifoQueue[bytearray]" = queue.LifoQueue(maxsize=MAX_POOLED_BUFFERS)
+
+
+@contextmanager
+def borrow() -> Iterator[bytearray]:
+    """
+    Empresta um buffer de BUFFER_SIZE bytes e o devolve ao pool ao final.
+
+    O LIFO favorece o buffer usado mais recentemente (ainda quente no
+    cache); sem buffer ocioso, um novo é alocado.
+
+    Yields:
+        bytearray de BUFFER_SIZE bytes, com conteúdo indefinido
+    """
+    try:
+        buffer = _pool.get_nowait()
+    except queue.Empty:
+        buffer = bytearray(BUFFER_SIZE)
+
+    try:
+        yield buffer
+    finally:
+        try:
+            _pool.put_nowait(buffer)
+        except queue.Full:
+            pass
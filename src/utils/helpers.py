@@ -2,14 +2,29 @@
 Funções auxiliares para o PDF Digest.
 """
 import hashlib
+import mmap
 import logging
 import os
+import re
+import threading
+import time
+import orjson
 import psutil
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from functools import wraps
+from typing import Callable, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Trechos que marcam uma chave de log como sensível, em uma única alternação
+_SENSITIVE_KEY_RE = re.compile(
+    '|'.join(map(re.escape, ['password', 'token', 'api_key', 'secret', 'auth', 'key'])),
+    re.IGNORECASE
+)
+
 
 def sanitize_log_data(data: dict) -> dict:
     """
@@ -21,15 +36,12 @@ def sanitize_log_data(data: dict) -> dict:
     Returns:
         Dicionário sanitizado
     """
-    sensitive_keys = ['password', 'token', 'api_key', 'secret', 'auth', 'key']
-    
     if not isinstance(data, dict):
         return data
     
     sanitized = {}
     for key, value in data.items():
-        key_lower = key.lower()
-        if any(sensitive in key_lower for sensitive in sensitive_keys):
+        if _SENSITIVE_KEY_RE.search(key):
             sanitized[key] = '***'
         elif isinstance(value, dict):
             sanitized[key] = sanitize_log_data(value)
@@ -43,24 +55,62 @@ def calculate_file_hash(file_path: str) -> str:
     """
     Calcula o hash SHA-256 de um arquivo.
     
+    O arquivo é mapeado em memória e entregue inteiro ao hashlib (OpenSSL),
+    sem cópias em blocos pelo Python; o OpenSSL usa as instruções SHA da CPU
+    (SHA-NI/ARMv8) quando disponíveis.
+    
     Args:
         file_path: Caminho do arquivo
         
     Returns:
         Hash hexadecimal do arquivo
     """
-    hash_sha256 = hashlib.sha256()
-    
     try:
         with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return hashlib.sha256(mapped).hexdigest()
+            except ValueError:
+                # Arquivos vazios não podem ser mapeados
+                return hashlib.sha256(f.read()).hexdigest()
     except Exception as e:
-        logger.error(f"Erro ao calcular hash do arquivo {file_path}: {e}")
+        logger.error("Erro ao calcular hash do arquivo %s: %s", file_path, e)
         raise
 
 
+def ttl_cache(seconds: float):
+    """
+    Decorator que memoriza o resultado da função por alguns segundos.
+    
+    O cache é por combinação de argumentos posicionais e protegido por lock,
+    de modo que threads concorrentes reaproveitam a mesma leitura.
+    
+    Args:
+        seconds: Tempo de validade de cada resultado
+    """
+    
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        entries: Dict[Tuple, Tuple[float, Any]] = {}
+        lock = threading.Lock()
+        
+        @wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                entry = entries.get(args)
+                if entry is not None and entry[0] > now:
+                    return entry[1]
+                
+                value = func(*args)
+                entries[args] = (now + seconds, value)
+                return value
+        
+        return wrapper
+    
+    return decorator
+
+
+@ttl_cache(seconds=1.0)
 def get_disk_usage(path: str = ".") -> float:
     """
     Retorna o percentual de uso do disco.
@@ -75,10 +125,11 @@ def get_disk_usage(path: str = ".") -> float:
         disk_usage = psutil.disk_usage(path)
         return (disk_usage.used / disk_usage.total) * 100
     except Exception as e:
-        logger.error(f"Erro ao obter uso do disco: {e}")
+        logger.error("Erro ao obter uso do disco: %s", e)
         return 0.0
 
 
+@ttl_cache(seconds=1.0)
 def get_memory_usage() -> float:
     """
     Retorna o percentual de uso da memória.
@@ -90,7 +141,7 @@ def get_memory_usage() -> float:
         memory = psutil.virtual_memory()
         return memory.percent
     except Exception as e:
-        logger.error(f"Erro ao obter uso da memória: {e}")
+        logger.error("Erro ao obter uso da memória: %s", e)
         return 0.0
 
 
@@ -153,6 +204,42 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size:.1f} {size_names[i]}"
 
 
+# Opções do orjson nas respostas da API (chaves não-string e arrays numpy das tabelas)
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """
+    Serializa o payload com orjson e o retorna como resposta JSON.
+    
+    Tipos que o orjson não conhece passam pelo default do Flask (Decimal,
+    objetos com __html__), como no jsonify; qualquer outro levanta
+    TypeError em vez de chegar ao cliente como repr.
+    
+    Args:
+        payload: Dados da resposta (normalmente o retorno de create_response)
+        status: Código HTTP
+        
+    Returns:
+        Resposta Flask com corpo em bytes
+    """
+    body = orjson.dumps(payload, default=DefaultJSONProvider.default, option=_JSON_OPTIONS)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def utcnow_iso() -> str:
+    """
+    Retorna o instante atual em UTC no formato de datetime.isoformat().
+    
+    Mantém o formato histórico dos endpoints /health e /stats: sem fuso
+    horário e com microssegundos (omitidos quando zero).
+    
+    Returns:
+        Timestamp no formato "2024-01-31T12:00:00.123456"
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
 def create_response(success: bool, data: Any = None, error: str = None, 
                    code: str = None, details: Dict = None) -> Dict[str, Any]:
     """
@@ -170,7 +257,7 @@ def create_response(success: bool, data: Any = None, error: str = None,
     """
     response = {
         'success': success,
-        'timestamp': int(__import__('time').time())
+        'timestamp': int(time.time())
     }
     
     if success:
@@ -0,0 +1,24 @@
+"""
+Ponto de entrada WSGI para servidores de produção (gunicorn).
+
+Uso:
+    gunicorn --worker-class gthread --workers 1 --threads 8 \
+        --bind 0.0.0.0:5000 src.wsgi:app
+
+Com workers gthread, uploads de rede e conversões (torch/docling liberam o
+GIL durante a inferência) de requisições diferentes se sobrepõem no mesmo
+processo, sem carregar um PDFService por requisição em andamento.
+
+A limpeza periódica (cleanup_service) não é iniciada aqui: o hook post_fork
+de gunicorn.conf.py a inicia em cada worker, e um lock entre processos garante
+que apenas um deles execute a limpeza.
+
+Workers gevent não são usados: o monkey patching transformaria as threads
+do JobService em greenlets, e uma conversão (CPU) bloquearia todo o loop,
+inclusive /api/health e /api/stats.
+"""
+from src.main import setup_logging
+from src.api.app import create_app
+
+setup_logging()
+app = create_app()
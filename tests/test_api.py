@@ -1,13 +1,17 @@
 """
 Testes de integração para a API do PDF Digest.
 """
+import json
 import os
+import shutil
 import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from io import BytesIO
 
 from src.api.app import create_app
+from src.api.middlewares import rate_limiter
+from src.config.settings import settings
 
 
 class TestPDFDigestAPI(unittest.TestCase):
@@ -23,6 +27,9 @@ class TestPDFDigestAPI(unittest.TestCase):
         self.app.config['TESTING'] = True
         self.client = self.app.test_client()
         
+        # Cada teste começa com a janela de rate limit vazia
+        rate_limiter.fallback.requests.clear()
+        
         # Cria diretório temporário para testes
         self.temp_dir = tempfile.mkdtemp()
         
@@ -118,6 +125,80 @@ class TestPDFDigestAPI(unittest.TestCase):
         self.assertIn('pages', data['data'])
         self.assertIn('file_info', data['data'])
     
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_convert_pdf_batch(self, mock_convert):
+        """
+        Testa conversão em lote com um arquivo válido e um inválido.
+        """
+        mock_result = MagicMock()
+        mock_result.document.export_to_markdown.return_value = 'NOTA DE NEGOCIAÇÃO\nConteúdo convertido'
+        mock_convert.return_value = mock_result
+        
+        data = {
+            'file0': (BytesIO(self.valid_pdf_content), 'test.pdf', 'application/pdf'),
+            'file1': (BytesIO(b'conteudo qualquer'), 'test.txt', 'text/plain')
+        }
+        
+        response = self.client.post('/api/convert-batch', data=data, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['data']['total_files'], 2)
+        self.assertEqual(data['data']['succeeded'], 1)
+        self.assertTrue(data['data']['results'][0]['success'])
+        self.assertIn('pages', data['data']['results'][0])
+        self.assertFalse(data['data']['results'][1]['success'])
+    
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_convert_pdf_raw_body(self, mock_convert):
+        """
+        Testa conversão com o PDF enviado diretamente no corpo (application/pdf).
+        """
+        mock_result = MagicMock()
+        mock_result.document.export_to_markdown.return_value = 'NOTA DE NEGOCIAÇÃO\nConteúdo convertido'
+        mock_convert.return_value = mock_result
+        
+        response = self.client.post('/api/convert', data=self.valid_pdf_content,
+                                    content_type='application/pdf')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertIn('1', data['data']['pages'])
+        self.assertEqual(data['data']['file_info']['pages_count'], 1)
+    
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_convert_pdf_ndjson_stream(self, mock_convert):
+        """
+        Testa a conversão em streaming NDJSON: cabeçalho seguido de uma linha por página.
+        """
+        mock_result = MagicMock()
+        mock_result.document.export_to_markdown.return_value = 'NOTA DE NEGOCIAÇÃO\nConteúdo convertido'
+        mock_convert.return_value = mock_result
+        
+        response = self.client.post('/api/convert?stream=true', data=self.valid_pdf_content,
+                                    content_type='application/pdf')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data().splitlines()]
+        self.assertIn('file_info', lines[0])
+        self.assertEqual(lines[1]['page'], '1')
+        self.assertIn('NOTA DE NEGOCIAÇÃO', lines[1]['markdown'])
+    
+    def test_convert_pdf_unsupported_content_type(self):
+        """
+        Testa que um Content-Type não suportado é rejeitado antes da conversão.
+        """
+        response = self.client.post('/api/convert', data=b'conteudo qualquer',
+                                    content_type='text/plain')
+        
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertFalse(data['success'])
+        self.assertEqual(data['error']['code'], 'UNSUPPORTED_CONTENT_TYPE')
+    
     def test_convert_pdf_no_file(self):
         """
         Testa conversão sem enviar arquivo.
@@ -163,10 +244,11 @@ class TestPDFDigestAPI(unittest.TestCase):
         """
         Testa conversão via JSON com caminho do arquivo.
         """
-        # Cria um arquivo PDF temporário
-        pdf_path = os.path.join(self.temp_dir, 'test.pdf')
+        # Cria um arquivo PDF na pasta de upload (única pasta aceita para caminhos)
+        pdf_path = os.path.join(settings.upload_folder, f'test_{os.getpid()}.pdf')
         with open(pdf_path, 'wb') as f:
             f.write(self.valid_pdf_content)
+        self.addCleanup(os.remove, pdf_path)
         
         with patch('src.services.pdf_service.DocumentConverter.convert') as mock_convert:
             mock_result = MagicMock()
@@ -179,6 +261,52 @@ class TestPDFDigestAPI(unittest.TestCase):
             data = response.get_json()
             self.assertTrue(data['success'])
     
+    def test_download_saved_table(self):
+        """
+        Testa o download de uma tabela salva pela URL gerada em _save_tables_job.
+        """
+        from src.api import routes
+        
+        tables_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tables_dir, ignore_errors=True)
+        output_dir = os.path.join(tables_dir, 'nota #1 ?_20240101_000000')
+        table_path = os.path.join(output_dir, 'table_1.csv')
+        
+        with patch.object(routes, 'TABLES_OUTPUT_DIR', tables_dir), \
+                patch.object(routes.pdf_service, 'save_tables_to_files',
+                             return_value={'csv': [table_path]}):
+            os.makedirs(output_dir)
+            with open(table_path, 'w') as f:
+                f.write('a,b\n1,2\n')
+            
+            saved_files = routes._save_tables_job({'tables': []}, output_dir)
+            url = saved_files['download_urls']['csv'][0]
+            self.assertEqual(url, '/api/tables/nota%20%231%20%3F_20240101_000000/table_1.csv')
+            
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('attachment', response.headers['Content-Disposition'])
+            self.assertEqual(response.get_data(), b'a,b\n1,2\n')
+            response.close()
+            
+            response = self.client.get('/api/tables/inexistente/table_1.csv')
+            self.assertEqual(response.status_code, 404)
+    
+    def test_convert_pdf_json_path_outside_upload_folder(self):
+        """
+        Testa que caminhos absolutos fora da pasta de upload são recusados.
+        """
+        for path in ('/etc/passwd', '/etc/nao_existe.pdf'):
+            response = self.client.post('/api/convert', json={'path': path})
+            
+            self.assertEqual(response.status_code, 400)
+            data = response.get_json()
+            self.assertFalse(data['success'])
+            self.assertEqual(data['error']['code'], 'SECURITY_ERROR')
+        
+        response = self.client.post('/api/convert', json={'path': '/etc', 'filename': 'passwd'})
+        self.assertEqual(response.status_code, 400)
+    
     def test_clear_cache_endpoint(self):
         """
         Testa o endpoint de limpeza de cache.
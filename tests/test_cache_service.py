@@ -91,15 +91,36 @@ class TestCacheService(unittest.TestCase):
         result = cache_service.delete('test_key')
         self.assertTrue(result)
         
-        # Testa clear_all
+        # Testa clear_all: remove só as chaves de cache, sem FLUSHDB
+        mock_client.scan_iter.side_effect = lambda match, count: iter(
+            ['pdf_conversion:abc'] if match == 'pdf_conversion:*' else []
+        )
+        mock_client.unlink.return_value = 1
         result = cache_service.clear_all()
-        mock_client.flushdb.assert_called_once()
+        mock_client.flushdb.assert_not_called()
+        mock_client.unlink.assert_called_once_with('pdf_conversion:abc')
         self.assertTrue(result)
         
         # Testa test_connection
         result = cache_service.test_connection()
         mock_client.ping.assert_called()
         self.assertTrue(result)
+    
+    def test_health_snapshot_single_pipeline(self):
+        """
+        Testa que health_snapshot faz PING, INFO e DBSIZE em um único pipeline.
+        """
+        mock_client = MagicMock()
+        pipe = mock_client.pipeline.return_value
+        pipe.execute.return_value = [True, {'used_memory_human': '1.5M'}, 3]
+        self.cache_service.enabled = True
+        self.cache_service.client = mock_client
+        
+        snapshot = self.cache_service.health_snapshot()
+        
+        self.assertEqual(snapshot, {'alive': True, 'keys': 3, 'used_memory': '1.5M'})
+        pipe.execute.assert_called_once()
+        mock_client.ping.assert_not_called()
 
 
 if __name__ == '__main__':
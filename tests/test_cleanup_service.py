@@ -0,0 +1,128 @@
+"""
+Testes para o serviço de limpeza periódica.
+"""
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.services import cleanup_service as cleanup_module
+from src.services.cleanup_service import CleanupService
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+
+
+class TestCleanupService(unittest.TestCase):
+    """
+    Testes unitários para o serviço de limpeza periódica.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para os testes.
+        """
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir, ignore_errors=True)
+        
+        self.cleanup_service = self._new_service()
+        self.cleanup_service.max_age_hours = 12
+        self.addCleanup(self.cleanup_service.stop)
+    
+    def _new_service(self) -> CleanupService:
+        """Cria um serviço com lock em diretório temporário do teste."""
+        service = CleanupService()
+        service.lock_path = os.path.join(self.lock_dir, 'cleanup.lock')
+        self.addCleanup(service._release)
+        return service
+    
+    def test_start_disabled_with_zero_interval(self):
+        """
+        Testa que intervalo zero desativa a limpeza periódica.
+        """
+        self.cleanup_service.interval = 0
+        
+        self.assertFalse(self.cleanup_service.start())
+        self.assertIsNone(self.cleanup_service._thread)
+    
+    @patch('src.services.cleanup_service.file_service')
+    def test_run_once(self, mock_file_service):
+        """
+        Testa que run_once remove uploads e tabelas com a idade configurada.
+        """
+        self.cleanup_service.run_once()
+        
+        mock_file_service.cleanup_old_files.assert_called_once_with(12)
+        mock_file_service.cleanup_old_table_outputs.assert_called_once_with(12)
+    
+    def test_loop_runs_until_stopped(self):
+        """
+        Testa que a thread executa a limpeza a cada intervalo e para com stop().
+        """
+        ran = threading.Event()
+        self.cleanup_service.interval = 0.01
+        
+        with patch.object(self.cleanup_service, 'run_once', side_effect=ran.set):
+            self.assertTrue(self.cleanup_service.start())
+            thread = self.cleanup_service._thread
+            
+            # Uma segunda chamada não cria outra thread
+            self.assertTrue(self.cleanup_service.start())
+            self.assertIs(self.cleanup_service._thread, thread)
+            
+            self.assertTrue(ran.wait(2))
+            self.cleanup_service.stop()
+            thread.join(2)
+        
+        self.assertFalse(thread.is_alive())
+    
+    def test_loop_survives_errors(self):
+        """
+        Testa que uma falha na limpeza não encerra a thread.
+        """
+        calls = []
+        second_run = threading.Event()
+        
+        def run_once():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError("falha")
+            second_run.set()
+        
+        self.cleanup_service.interval = 0.01
+        with patch.object(self.cleanup_service, 'run_once', side_effect=run_once):
+            self.cleanup_service.start()
+            self.assertTrue(second_run.wait(2))
+    
+    @unittest.skipUnless(cleanup_module.fcntl, "flock indisponível nesta plataforma")
+    def test_single_leader_across_processes(self):
+        """
+        Testa que apenas um detentor do lock executa a limpeza e que outro assume ao liberar.
+        """
+        other = self._new_service()
+        
+        self.assertTrue(self.cleanup_service.is_leader())
+        self.assertFalse(other.is_leader())
+        
+        self.cleanup_service._release()
+        self.assertTrue(other.is_leader())
+    
+    def test_gunicorn_post_fork_starts_cleanup(self):
+        """
+        Testa que o hook post_fork do gunicorn inicia a limpeza no worker.
+        """
+        spec = importlib.util.spec_from_file_location('gunicorn_conf', GUNICORN_CONF)
+        gunicorn_conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gunicorn_conf)
+        
+        with patch.object(cleanup_module.cleanup_service, 'start') as mock_start:
+            gunicorn_conf.post_fork(server=None, worker=None)
+        
+        mock_start.assert_called_once_with()
+        self.assertFalse(hasattr(gunicorn_conf, 'when_ready'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 Testes para o serviço de gestão de arquivos.
 """
 import os
+import shutil
 import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
@@ -120,6 +121,54 @@ class TestFileService(unittest.TestCase):
         with self.assertRaises(ValidationError):
             self.file_service.save_uploaded_file(file_storage)
     
+    def test_read_uploaded_file_success(self):
+        """
+        Testa a leitura de upload em memória, sem gravação em disco.
+        """
+        pdf_content = b'%PDF-1.5\nconteudo do pdf'
+        file_storage = FileStorage(
+            stream=BytesIO(pdf_content),
+            filename='test.pdf',
+            content_type='application/pdf'
+        )
+        
+        result = self.file_service.read_uploaded_file(file_storage)
+        
+        self.assertEqual(result['content'], pdf_content)
+        self.assertEqual(result['file_size'], len(pdf_content))
+        self.assertEqual(result['original_filename'], 'test.pdf')
+        self.assertNotIn('file_path', result)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['invalid.txt', 'valid.pdf'])
+    
+    @unittest.skipUnless(FileService().streaming_enabled, "streaming-form-data não instalado")
+    def test_save_streamed_upload_invalid_extension(self):
+        """
+        Testa que o upload em streaming com extensão inválida é rejeitado e removido.
+        """
+        body = (
+            b'--limite\r\n'
+            b'Content-Disposition: form-data; name="file"; filename="test.txt"\r\n'
+            b'Content-Type: text/plain\r\n\r\n'
+            b'conteudo qualquer\r\n'
+            b'--limite--\r\n'
+        )
+        
+        with self.assertRaises(ValidationError):
+            self.file_service.save_streamed_upload(
+                BytesIO(body), 'multipart/form-data; boundary=limite'
+            )
+        
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['invalid.txt', 'valid.pdf'])
+    
+    def test_save_raw_upload_invalid_content(self):
+        """
+        Testa que o corpo que não é PDF é rejeitado e removido do disco.
+        """
+        with self.assertRaises(SecurityError):
+            self.file_service.save_raw_upload(BytesIO(b'conteudo qualquer'), 'test.pdf')
+        
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['invalid.txt', 'valid.pdf'])
+    
     def test_validate_existing_file_valid(self):
         """
         Testa a validação de arquivo existente válido.
@@ -139,6 +188,16 @@ class TestFileService(unittest.TestCase):
         with self.assertRaises(ValidationError):
             self.file_service.validate_existing_file(self.invalid_file_path)
     
+    def test_validate_existing_file_outside_upload_folder(self):
+        """
+        Testa que caminhos fora da pasta de upload são recusados sem revelar se existem.
+        """
+        for path in ('/etc/passwd', '/etc/nao_existe.pdf',
+                     os.path.join(self.temp_dir, '..', 'outro.pdf')):
+            with self.assertRaises(SecurityError) as ctx:
+                self.file_service.validate_existing_file(path)
+            self.assertIn('pasta de upload', str(ctx.exception))
+    
     def test_cleanup_file_existing(self):
         """
         Testa a limpeza de arquivo existente.
@@ -193,6 +252,27 @@ class TestFileService(unittest.TestCase):
         
         # Verifica se pelo menos alguns arquivos foram removidos
         self.assertGreaterEqual(removed_count, 0)
+    
+    def test_cleanup_old_table_outputs(self):
+        """
+        Testa a remoção de diretórios antigos de tabelas salvas.
+        """
+        tables_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tables_dir, ignore_errors=True)
+        old_dir = os.path.join(tables_dir, 'antigo_20240101_000000')
+        os.makedirs(old_dir)
+        with open(os.path.join(old_dir, 'table_1.csv'), 'w') as f:
+            f.write('a,b')
+        os.makedirs(os.path.join(tables_dir, 'recente'))
+        
+        # Envelhece apenas o primeiro diretório (48 horas)
+        old_time = os.path.getmtime(old_dir) - 48 * 3600
+        os.utime(old_dir, (old_time, old_time))
+        
+        removed_count = self.file_service.cleanup_old_table_outputs(24, tables_dir)
+        
+        self.assertEqual(removed_count, 1)
+        self.assertEqual(os.listdir(tables_dir), ['recente'])
 
 
 if __name__ == '__main__':
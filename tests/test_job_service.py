@@ -0,0 +1,89 @@
+"""
+Testes para o serviço de jobs em segundo plano.
+"""
+import unittest
+from unittest.mock import patch
+
+from src.services.job_service import JobService
+from src.utils.exceptions import ConversionError
+
+
+class TestJobService(unittest.TestCase):
+    """
+    Testes unitários para o serviço de jobs.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para os testes.
+        """
+        # Estado dos jobs em memória (sem Redis)
+        patcher = patch('src.services.job_service.cache_service.enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.job_service = JobService()
+        self.addCleanup(self.job_service.executor.shutdown)
+    
+    def _wait(self, job_id):
+        """Aguarda o término dos jobs enfileirados e retorna o estado do job."""
+        self.job_service.executor.shutdown(wait=True)
+        return self.job_service.get(job_id)
+    
+    def test_job_finished(self):
+        """
+        Testa que o resultado do job fica disponível após a execução.
+        """
+        job_id = self.job_service.submit(lambda value: {'value': value}, 42)
+        
+        job = self._wait(job_id)
+        
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['result'], {'value': 42})
+    
+    def test_job_failed(self):
+        """
+        Testa que erros do PDF Digest são registrados no job.
+        """
+        def fail():
+            raise ConversionError("falhou", code="CONVERSION_ERROR")
+        
+        job = self._wait(self.job_service.submit(fail))
+        
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error']['code'], 'CONVERSION_ERROR')
+    
+    @patch('src.services.job_service.file_service.cleanup_file')
+    def test_job_cleanup(self, mock_cleanup):
+        """
+        Testa que o arquivo do job é removido ao terminar.
+        """
+        self._wait(self.job_service.submit(lambda: {}, cleanup_path='/tmp/upload.pdf'))
+        
+        mock_cleanup.assert_called_once_with('/tmp/upload.pdf')
+    
+    @patch('src.services.job_service.cache_service')
+    def test_job_state_kept_in_memory_when_redis_write_fails(self, mock_cache):
+        """
+        Testa que o estado final fica disponível mesmo se o Redis recusar a gravação.
+        """
+        mock_cache.enabled = True
+        mock_cache.set.side_effect = [True, True, False]
+        mock_cache.get.return_value = {'status': 'running'}
+        
+        job_id = self.job_service.submit(lambda: {'value': 1})
+        job = self._wait(job_id)
+        
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['result'], {'value': 1})
+        mock_cache.get.assert_not_called()
+    
+    def test_unknown_job(self):
+        """
+        Testa a consulta de um job inexistente.
+        """
+        self.assertIsNone(self.job_service.get('inexistente'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+"""
+Testes para os middlewares da API (rate limiting).
+"""
+import unittest
+from unittest.mock import patch, MagicMock
+
+from flask import Flask
+
+from src.api.middlewares import (
+    RateLimiter, RedisRateLimiter, rate_limit_middleware, setup_error_handlers
+)
+from src.config.settings import settings
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401 (necessário para scripts Lua no fakeredis)
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Testes unitários para o rate limiter em memória.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para os testes: limites pequenos e relógio controlado.
+        """
+        for name, value in (('rate_limit_per_minute', 2),
+                            ('rate_limit_per_hour', 3),
+                            ('rate_limit_per_day', 100)):
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        self.now = 1000.0
+        time_patcher = patch('src.api.middlewares.time')
+        mock_time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        mock_time.monotonic.side_effect = lambda: self.now
+        
+        self.limiter = RateLimiter(max_clients=2)
+    
+    def test_window_admission_and_rejection(self):
+        """
+        Testa que a janela de um minuto admite até o limite e volta a admitir ao expirar.
+        """
+        self.assertTrue(self.limiter.is_allowed('cliente'))
+        self.now += 1
+        self.assertTrue(self.limiter.is_allowed('cliente'))
+        self.now += 1
+        self.assertFalse(self.limiter.is_allowed('cliente'))
+        
+        # A primeira requisição sai da janela de um minuto
+        self.now = 1000.0 + 61
+        self.assertTrue(self.limiter.is_allowed('cliente'))
+        
+        # Agora o limite por hora (3) é que barra
+        self.now += 120
+        self.assertFalse(self.limiter.is_allowed('cliente'))
+    
+    def test_rejected_requests_are_not_counted(self):
+        """
+        Testa que requisições negadas não ocupam vaga na janela.
+        """
+        self.limiter.is_allowed('cliente')
+        self.limiter.is_allowed('cliente')
+        for _ in range(5):
+            self.assertFalse(self.limiter.is_allowed('cliente'))
+        
+        self.assertEqual(len(self.limiter.requests['cliente']), 2)
+    
+    def test_acquire_returns_retry_seconds(self):
+        """
+        Testa que acquire retorna 0 ao admitir e os segundos até a próxima vaga ao negar.
+        """
+        self.assertEqual(self.limiter.acquire('cliente'), 0)
+        self.now += 10
+        self.assertEqual(self.limiter.acquire('cliente'), 0)
+        self.now += 5
+        
+        # A vaga surge quando a primeira requisição (t=1000) sair da janela de 60 s
+        self.assertEqual(self.limiter.acquire('cliente'), 45)
+    
+    def test_max_clients_eviction(self):
+        """
+        Testa que o identificador usado há mais tempo é descartado além de max_clients.
+        """
+        self.limiter.is_allowed('a')
+        self.limiter.is_allowed('b')
+        self.limiter.is_allowed('a')
+        self.limiter.is_allowed('c')
+        
+        self.assertEqual(list(self.limiter.requests), ['a', 'c'])
+    
+    @patch('src.api.middlewares.cache_service')
+    def test_redis_limiter_falls_back_to_memory(self, mock_cache):
+        """
+        Testa que, sem Redis, o limiter compartilhado usa o limiter em memória.
+        """
+        mock_cache.enabled = False
+        limiter = RedisRateLimiter(self.limiter)
+        
+        self.assertTrue(limiter.is_allowed('cliente'))
+        self.assertIn('cliente', self.limiter.requests)
+        mock_cache.client.register_script.assert_not_called()
+
+
+class TestRedisRateLimiter(unittest.TestCase):
+    """
+    Testes unitários para o rate limiter compartilhado via Redis.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para os testes: limites pequenos e cache simulado.
+        """
+        for name, value in (('rate_limit_per_minute', 2),
+                            ('rate_limit_per_hour', 3),
+                            ('rate_limit_per_day', 100)):
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        cache_patcher = patch('src.api.middlewares.cache_service')
+        self.mock_cache = cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.mock_cache.enabled = True
+        
+        self.fallback = MagicMock(spec=RateLimiter)
+        self.limiter = RedisRateLimiter(self.fallback)
+    
+    def test_script_registered_once_and_called_with_windows(self):
+        """
+        Testa que o script Lua é registrado uma vez e recebe as janelas e limites.
+        """
+        script = self.mock_cache.client.register_script.return_value
+        script.return_value = 0
+        
+        self.assertEqual(self.limiter.acquire('cliente'), 0)
+        self.assertEqual(self.limiter.acquire('cliente'), 0)
+        
+        self.mock_cache.client.register_script.assert_called_once_with(RedisRateLimiter.LUA_SCRIPT)
+        kwargs = script.call_args.kwargs
+        self.assertEqual(kwargs['keys'], ['ratelimit:cliente'])
+        self.assertEqual(kwargs['args'][2:], [60, 2, 3600, 3, 86400, 100])
+        self.fallback.acquire.assert_not_called()
+    
+    def test_script_error_falls_back_to_memory(self):
+        """
+        Testa que uma falha do Redis usa o limiter em memória.
+        """
+        self.mock_cache.client.register_script.return_value.side_effect = ConnectionError('down')
+        self.fallback.acquire.return_value = 0
+        
+        self.assertTrue(self.limiter.is_allowed('cliente'))
+        self.fallback.acquire.assert_called_once_with('cliente')
+    
+    @unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis/lupa não instalados")
+    def test_lua_sliding_window(self):
+        """
+        Testa a janela deslizante do script Lua contra um Redis simulado.
+        """
+        self.mock_cache.client = fakeredis.FakeRedis(decode_responses=True)
+        
+        with patch('src.api.middlewares.time') as mock_time:
+            mock_time.time.return_value = 1000.0
+            self.assertEqual(self.limiter.acquire('cliente'), 0)
+            mock_time.time.return_value = 1010.0
+            self.assertEqual(self.limiter.acquire('cliente'), 0)
+            
+            # Terceira requisição no minuto: vaga quando a primeira sair da janela
+            mock_time.time.return_value = 1020.0
+            self.assertEqual(self.limiter.acquire('cliente'), 40)
+            self.assertEqual(self.mock_cache.client.zcard('ratelimit:cliente'), 2)
+            
+            mock_time.time.return_value = 1061.0
+            self.assertEqual(self.limiter.acquire('cliente'), 0)
+        
+        self.fallback.acquire.assert_not_called()
+
+
+class TestRateLimitMiddleware(unittest.TestCase):
+    """
+    Testes do decorator de rate limiting e do handler de 429.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para os testes: app mínima com uma rota limitada.
+        """
+        app = Flask(__name__)
+        setup_error_handlers(app)
+        
+        @app.route('/limitada')
+        @rate_limit_middleware()
+        def limitada():
+            return 'ok'
+        
+        self.client = app.test_client()
+        
+        limiter_patcher = patch('src.api.middlewares.rate_limiter')
+        self.mock_limiter = limiter_patcher.start()
+        self.addCleanup(limiter_patcher.stop)
+    
+    def test_retry_after_header_on_429(self):
+        """
+        Testa que a resposta 429 traz Retry-After com os segundos informados pelo limiter.
+        """
+        self.mock_limiter.acquire.return_value = 7
+        
+        response = self.client.get('/limitada')
+        
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '7')
+        data = response.get_json()
+        self.assertEqual(data['error']['code'], 'RATE_LIMIT_EXCEEDED')
+        self.assertEqual(data['error']['details']['retry_after'], 7)
+    
+    def test_allowed_request_has_no_retry_after(self):
+        """
+        Testa que uma requisição admitida segue para a view.
+        """
+        self.mock_limiter.acquire.return_value = 0
+        
+        response = self.client.get('/limitada')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Retry-After', response.headers)
+    
+    def test_allowlisted_ip_skips_limiter(self):
+        """
+        Testa que um IP da allowlist não passa pelo limiter.
+        """
+        self.mock_limiter.acquire.return_value = 7
+        
+        with patch('src.api.middlewares.RATE_LIMIT_ALLOWLIST', frozenset({'127.0.0.1'})):
+            response = self.client.get('/limitada')
+        
+        self.assertEqual(response.status_code, 200)
+        self.mock_limiter.acquire.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -129,6 +129,25 @@ class TestPDFService(unittest.TestCase):
         self.assertIsInstance(result, dict)
         mock_convert.assert_called_once_with(self.valid_pdf_path)
     
+    @patch('src.services.pdf_service.cache_service')
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_convert_pdf_cache_checked_skips_lookup(self, mock_convert, mock_cache):
+        """
+        Testa que cache_checked evita repetir a consulta ao cache, mas ainda armazena o resultado.
+        """
+        mock_result = MagicMock()
+        mock_result.document.export_to_markdown.return_value = 'NOTA DE NEGOCIAÇÃO\nConteúdo'
+        mock_convert.return_value = mock_result
+        mock_cache.enabled = True
+        
+        result = self.pdf_service.convert_pdf_to_markdown(
+            self.valid_pdf_path, file_hash='abc', cache_checked=True
+        )
+        
+        self.assertIn('1', result)
+        mock_cache.get.assert_not_called()
+        mock_cache.set.assert_called_once_with('pdf_conversion:abc', result)
+    
     def test_split_by_nota_negociacao(self):
         """
         Testa a divisão do markdown por notas de negociação.
@@ -306,6 +325,43 @@ class TestPDFService(unittest.TestCase):
                 if result['tables']:
                     self.assertEqual(result['tables'][0]['format'], fmt)
 
+    @patch('src.services.pdf_service.cache_service')
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_extract_tables_uses_cache(self, mock_convert, mock_cache):
+        """
+        Testa que tabelas em cache evitam uma nova conversão do PDF.
+        """
+        cached_result = {
+            'tables': [],
+            'metadata': {'total_tables': 0, 'export_format': 'csv'}
+        }
+        mock_cache.enabled = True
+        mock_cache.get.return_value = cached_result
+        
+        result = self.pdf_service.extract_tables_advanced(self.valid_pdf_path, "csv")
+        
+        self.assertEqual(result, cached_result)
+        mock_convert.assert_not_called()
+        cache_key = mock_cache.get.call_args[0][0]
+        self.assertTrue(cache_key.startswith('pdf_tables:'))
+        self.assertTrue(cache_key.endswith(':csv'))
+
+    @patch('src.services.pdf_service.cache_service')
+    @patch('src.services.pdf_service.DocumentConverter.convert')
+    def test_convert_with_known_hash_uses_cache(self, mock_convert, mock_cache):
+        """
+        Testa que um hash já conhecido consulta o cache antes de validar e converter.
+        """
+        cached_result = {'1': 'NOTA DE NEGOCIAÇÃO\nConteúdo em cache'}
+        mock_cache.enabled = True
+        mock_cache.get.return_value = cached_result
+        
+        result = self.pdf_service.convert_pdf_to_markdown(self.invalid_file_path, file_hash='abc123')
+        
+        self.assertEqual(result, cached_result)
+        mock_convert.assert_not_called()
+        mock_cache.get.assert_called_once_with('pdf_conversion:abc123')
+
     def test_extract_tables_with_invalid_file(self):
         """
         Testa a extração de tabelas com arquivo inválido.